@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+# Build command for the Render service (./build.sh). The SQLite database is
+# not in the repository, so it is created here, next to the collected assets.
+set -o errexit
+
+pip install -r requirements.txt
+python manage.py build_assets
+python manage.py migrate --no-input
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class LoopAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'loop_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,72 @@
+"""
+Snowflake-style ids for sharded rows.
+
+    | 41 bits: ms since ID_EPOCH | 4 bits: shard | 8 bits: sequence |
+
+The shard is part of the id, so any post, comment or like can be found
+from its id alone. At 53 bits the ids still fit the BigAutoField columns
+and stay exact as JavaScript Numbers, which the page scripts rely on.
+"""
+import os
+import random
+import threading
+import time
+
+ID_EPOCH_MS = 1735689600000  # 2025-01-01T00:00:00Z
+
+SHARD_BITS = 4
+SEQUENCE_BITS = 8
+MAX_SHARDS = 1 << SHARD_BITS
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+
+# Rows created before ids were generated here have small autoincrement ids.
+FIRST_GENERATED_ID = 1 << 32
+
+_lock = threading.Lock()
+_last_ms = 0
+# Processes start at different sequence offsets so that two of them rarely
+# hand out the same id in the same millisecond; ShardedModel.save() retries
+# on the rare collision.
+_sequence = random.randrange(SEQUENCE_MASK + 1)
+_tick_start = _sequence
+
+
+def _reseed():
+    # Workers forked from one parent (e.g. gunicorn --preload) would
+    # otherwise all continue from the parent's sequence.
+    global _lock, _sequence, _tick_start
+    _lock = threading.Lock()
+    _sequence = _tick_start = random.randrange(SEQUENCE_MASK + 1)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reseed)
+
+
+def _now_ms():
+    return int(time.time() * 1000) - ID_EPOCH_MS
+
+
+def next_id(shard_index):
+    global _last_ms, _sequence, _tick_start
+    if not 0 <= shard_index < MAX_SHARDS:
+        raise ValueError(f'shard index must be in [0, {MAX_SHARDS})')
+    with _lock:
+        # max() keeps ids unique if the clock steps backwards.
+        now = max(_now_ms(), _last_ms)
+        _sequence = (_sequence + 1) & SEQUENCE_MASK
+        if now != _last_ms:
+            _tick_start = _sequence
+        elif _sequence == _tick_start:
+            # All 256 ids of this millisecond are used; wait for the next one.
+            while now <= _last_ms:
+                now = _now_ms()
+        _last_ms = now
+        return (now << (SHARD_BITS + SEQUENCE_BITS)) | (shard_index << SEQUENCE_BITS) | _sequence
+
+
+def shard_index_of(object_id):
+    """Returns the shard index encoded in an id, or None for legacy ids."""
+    if object_id < FIRST_GENERATED_ID:
+        return None
+    return (object_id >> SEQUENCE_BITS) & (MAX_SHARDS - 1)
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from loop_app.models import Post, PostTag
+from loop_app.sharding import shard_aliases
+from loop_app.tags import extract_tags
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the hashtag/mention index for existing posts, a chunk of '
+        'posts at a time on each shard.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        for using in shard_aliases():
+            self.backfill(using, options['chunk_size'])
+
+    def backfill(self, using, chunk_size):
+        posts = (
+            Post.objects.using(using).only('id', 'content', 'created_at')
+            .order_by('id')
+            .iterator(chunk_size=chunk_size)
+        )
+
+        seen = indexed = 0
+        pending = []
+        for post in posts:
+            seen += 1
+            pending.extend(
+                PostTag(post_id=post.id, kind=kind, tag=tag, created_at=post.created_at)
+                for kind, tag in extract_tags(post.content)
+            )
+            if len(pending) >= chunk_size:
+                indexed += self.flush(using, pending)
+                pending = []
+                self.stdout.write(f'{using}: {seen} posts scanned, {indexed} tags indexed')
+
+        if pending:
+            indexed += self.flush(using, pending)
+        self.stdout.write(f'Done with {using}: {seen} posts scanned, {indexed} tags indexed')
+
+    def flush(self, using, rows):
+        # Re-running the backfill skips rows that are already indexed.
+        with transaction.atomic(using=using):
+            PostTag.objects.using(using).bulk_create(rows, ignore_conflicts=True)
+        return len(rows)
@@ -0,0 +1,156 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from loop_app.management.scratch import scratch_databases
+from loop_app.models import User, UserProfile, Post, Follow
+from loop_app.serializers import UserProfileSerializer, UserSearchSerializer
+from loop_app.views import UserSearchView, UserProfileView
+
+
+class LegacyCounts(serializers.Serializer):
+    # Counted per row, as the serializers did before with_counts().
+    followers_count = serializers.SerializerMethodField()
+    following_count = serializers.SerializerMethodField()
+
+    def get_followers_count(self, obj):
+        return Follow.objects.filter(following=obj.user).count()
+
+    def get_following_count(self, obj):
+        return Follow.objects.filter(follower=obj.user).count()
+
+
+class LegacySearchSerializer(LegacyCounts, UserSearchSerializer):
+    is_following = serializers.SerializerMethodField()
+
+    def get_is_following(self, obj):
+        user = self.context['request'].user
+        return Follow.objects.filter(follower=user, following=obj.user).exists()
+
+
+class LegacyProfileSerializer(LegacyCounts, UserProfileSerializer):
+    pass
+
+
+class LegacySearchView(UserSearchView):
+    """Search as it was before profiles were made at signup."""
+    serializer_class = LegacySearchSerializer
+
+    def get_queryset(self):
+        query = self.request.GET.get('query', '').strip()
+        users = User.objects.filter(
+            Q(username__icontains=query) |
+            Q(first_name__icontains=query) |
+            Q(last_name__icontains=query),
+            deleted_at__isnull=True,
+        )
+        return [UserProfile.objects.get_or_create(user=user)[0] for user in users]
+
+
+class LegacyProfileView(UserProfileView):
+    serializer_class = LegacyProfileSerializer
+
+    def get_object(self):
+        return UserProfile.objects.get_or_create(user=self.request.user)[0]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure user search and own-profile latency on a scratch database '
+        'while a writer thread keeps creating posts, for the old get_or_create '
+        'views and then the current ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        with scratch_databases():
+            self.seed(options['users'])
+            results = {
+                'baseline': self.run(LegacySearchView, LegacyProfileView, options),
+                'current': self.run(UserSearchView, UserProfileView, options),
+            }
+
+        self.stdout.write(
+            f"{'endpoint':<10} {'views':<9} {'requests':>9} {'p50 ms':>8} "
+            f"{'p95 ms':>8} {'p99 ms':>8} {'writes/s':>9}"
+        )
+        for name in ('search', 'profile'):
+            for views, (latencies, writes) in results.items():
+                samples = latencies[name]
+                if len(samples) < 2:
+                    continue
+                q = statistics.quantiles(samples, n=100)
+                self.stdout.write(
+                    f'{name:<10} {views:<9} {len(samples):>9} {q[49] * 1000:>8.2f} '
+                    f'{q[94] * 1000:>8.2f} {q[98] * 1000:>8.2f} {writes:>9.0f}'
+                )
+
+    def seed(self, count):
+        users = User.objects.bulk_create(
+            User(username=f'bench{i}', first_name=f'Bench {i}') for i in range(count)
+        )
+        # bulk_create skips post_save, so create the profiles the signal would have.
+        UserProfile.objects.bulk_create(UserProfile(user=user) for user in users)
+        Follow.objects.bulk_create(
+            Follow(follower=users[i], following=users[(i * 7 + 1) % count])
+            for i in range(count) if i != (i * 7 + 1) % count
+        )
+
+    def run(self, search_view, profile_view, options):
+        """Returns the latencies per endpoint and the writer's rate."""
+        factory = APIRequestFactory()
+        search = search_view.as_view(throttle_classes=[])
+        profile = profile_view.as_view()
+        user = User.objects.get(username='bench0')
+        stop = threading.Event()
+        latencies = {'search': [], 'profile': []}
+        writes = [0]
+        lock = threading.Lock()
+
+        def reader(n):
+            local = {'search': [], 'profile': []}
+            while not stop.is_set():
+                for name, view, url in (
+                    ('search', search, f'/search/users/?query=bench{n}'),
+                    ('profile', profile, '/profiles/me/'),
+                ):
+                    request = factory.get(url)
+                    force_authenticate(request, user=user)
+                    start = time.perf_counter()
+                    response = view(request)
+                    response.render()
+                    local[name].append(time.perf_counter() - start)
+            connections.close_all()
+            with lock:
+                for name, samples in local.items():
+                    latencies[name].extend(samples)
+
+        def writer():
+            i = 0
+            while not stop.is_set():
+                author = User.objects.get(username=f'bench{i % options["users"]}')
+                Post.objects.create(user=author, content=f'bench post {i}')
+                i += 1
+            connections.close_all()
+            writes[0] = i
+
+        threads = [threading.Thread(target=reader, args=(n,)) for n in range(options['readers'])]
+        threads.append(threading.Thread(target=writer))
+        for t in threads:
+            t.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for t in threads:
+            t.join()
+
+        return latencies, writes[0] / options['seconds']
@@ -0,0 +1,100 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from loop_app.management.scratch import scratch_databases
+from loop_app.models import User, Post
+from loop_app.routers import pin_to_primary
+from loop_app.sharding import with_authors
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent feed-page reads through the configured DATABASES '
+        'and routers on a scratch database with a writer running: reads on '
+        'the primary with a connection per request, on the primary with '
+        'CONN_MAX_AGE, and routed to the replica as configured.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=3.0)
+        parser.add_argument('--rows', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with scratch_databases():
+            self.seed(options['rows'])
+            max_age = connections.settings['default']['CONN_MAX_AGE']
+            configs = [
+                ('primary', 0),
+                ('primary', max_age),
+                ('replica', max_age),
+            ]
+            results = [(route, age, *self.run(route, age, options)) for route, age in configs]
+
+        baseline = results[0][2] or 1
+        self.stdout.write(
+            f"{'reads on':<8} {'CONN_MAX_AGE':>12} {'reads/s':>10} {'writes/s':>10} {'speedup':>8}"
+        )
+        for route, age, reads, writes in results:
+            self.stdout.write(
+                f'{route:<8} {age:>12} {reads:>10.0f} {writes:>10.0f} {reads / baseline:>7.1f}x'
+            )
+
+    def seed(self, rows):
+        users = User.objects.bulk_create(User(username=f'bench{i}') for i in range(100))
+        Post.objects.bulk_create(
+            (Post(user=users[i % 100], content='x' * 200) for i in range(rows)),
+            batch_size=500,
+        )
+
+    def run(self, route, max_age, options):
+        # Threads open their own connections from these settings.
+        for alias in ('default', 'replica'):
+            connections.settings[alias]['CONN_MAX_AGE'] = max_age
+        user = User.objects.get(username='bench0')
+        stop = threading.Event()
+        counts = {'reads': 0, 'writes': 0}
+        lock = threading.Lock()
+
+        def request(work):
+            # What the request_started and request_finished signals do.
+            close_old_connections()
+            try:
+                work()
+            finally:
+                close_old_connections()
+
+        def reader():
+            if route == 'primary':
+                pin_to_primary()
+            done = 0
+            while not stop.is_set():
+                request(lambda: list(with_authors(Post.objects.order_by('-created_at'))[:20]))
+                done += 1
+            connections.close_all()
+            with lock:
+                counts['reads'] += done
+
+        def writer():
+            done = 0
+            while not stop.is_set():
+                request(lambda: Post.objects.create(user=user, content='y' * 200))
+                done += 1
+            connections.close_all()
+            with lock:
+                counts['writes'] += done
+
+        threads = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        threads.append(threading.Thread(target=writer))
+        for t in threads:
+            t.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for t in threads:
+            t.join()
+
+        seconds = options['seconds']
+        return counts['reads'] / seconds, counts['writes'] / seconds
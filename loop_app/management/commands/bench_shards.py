@@ -0,0 +1,75 @@
+import copy
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import override_settings
+
+from loop_app.management.scratch import scratch_databases
+from loop_app.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent post-write throughput with Post.objects.create() '
+        'on scratch databases, with posts partitioned by author across 1, 2, '
+        '4... shard aliases configured like the ones in settings. Writers '
+        'are separate processes, as they would be under gunicorn.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=3.0)
+        parser.add_argument(
+            '--shards', default='1,2,4,8',
+            help='Comma-separated shard counts to compare.',
+        )
+
+    def handle(self, *args, **options):
+        # Extra shards are set up like settings.py does it: copies of 'default'.
+        template = copy.deepcopy(connections.settings['default'])
+        results = []
+        for shards in (int(n) for n in options['shards'].split(',')):
+            aliases = ['default'] + [f'bench_shard{i}' for i in range(1, shards)]
+            for alias in aliases[1:]:
+                connections.settings.setdefault(alias, copy.deepcopy(template))
+            with override_settings(DATABASE_SHARDS=aliases), scratch_databases(aliases):
+                results.append((shards, self._run(options)))
+
+        baseline = results[0][1] or 1
+        self.stdout.write(f"{'shards':>6} {'writes/s':>10} {'speedup':>8}")
+        for shards, writes in results:
+            self.stdout.write(f'{shards:>6} {writes:>10.0f} {writes / baseline:>7.1f}x')
+
+    def _run(self, options):
+        # Children must open their own connections.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        total = context.Value('q', 0)
+        workers = [
+            context.Process(target=self._write, args=(n, options['writers'], stop, total))
+            for n in range(options['writers'])
+        ]
+        for w in workers:
+            w.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for w in workers:
+            w.join()
+        return total.value / options['seconds']
+
+    def _write(self, n, writers, stop, total):
+        # Each writer posts as a rotating set of authors, like the request
+        # workers of a busy site would. Post.user has no database constraint,
+        # so the authors need no rows of their own.
+        done = 0
+        user_id = n + 1
+        while not stop.is_set():
+            Post.objects.create(user_id=user_id, content='y' * 200)
+            done += 1
+            user_id += writers
+        connections.close_all()
+        with total.get_lock():
+            total.value += done
@@ -0,0 +1,91 @@
+import gzip
+import os
+import subprocess
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.map', '.txt', '.html')
+MIN_COMPRESS_SIZE = 256
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the purged Tailwind stylesheet, collect static files into '
+        'fingerprinted names and write gzip/brotli copies next to them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--skip-css', action='store_true',
+            help='Reuse the existing stylesheet instead of running the Tailwind CLI.',
+        )
+        parser.add_argument(
+            '--no-compress', action='store_true',
+            help='Do not write .gz/.br files.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['skip_css']:
+            self.build_css()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.stdout.write(f'Collected static files into {settings.STATIC_ROOT}')
+        if not options['no_compress']:
+            self.compress(settings.STATIC_ROOT)
+
+    def build_css(self):
+        output = settings.BASE_DIR / 'loop_app' / 'static' / settings.TAILWIND_OUTPUT
+        output.parent.mkdir(parents=True, exist_ok=True)
+        command = [
+            settings.TAILWIND_CLI,
+            '--config', str(settings.TAILWIND_CONFIG),
+            '--input', str(settings.TAILWIND_INPUT),
+            '--output', str(output),
+            '--minify',
+        ]
+        try:
+            subprocess.run(command, cwd=settings.BASE_DIR, check=True)
+        except FileNotFoundError:
+            raise CommandError(
+                f'Tailwind CLI "{settings.TAILWIND_CLI}" not found. Download the '
+                'standalone tailwindcss binary and set TAILWIND_CLI to its path.'
+            )
+        except subprocess.CalledProcessError as e:
+            raise CommandError(f'Tailwind build failed with exit code {e.returncode}')
+        self.stdout.write(f'Built {output} ({output.stat().st_size} bytes)')
+
+    def compress(self, root):
+        written = 0
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                if not filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, filename)
+                with open(path, 'rb') as f:
+                    data = f.read()
+                if len(data) < MIN_COMPRESS_SIZE:
+                    continue
+
+                # mtime=0 keeps the output identical between builds.
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                if len(compressed) < len(data):
+                    with open(path + '.gz', 'wb') as f:
+                        f.write(compressed)
+                    written += 1
+
+                if brotli is not None:
+                    compressed = brotli.compress(data, quality=11)
+                    if len(compressed) < len(data):
+                        with open(path + '.br', 'wb') as f:
+                            f.write(compressed)
+                        written += 1
+
+        if brotli is None:
+            self.stdout.write('brotli is not installed; wrote gzip files only')
+        self.stdout.write(f'Wrote {written} precompressed files')
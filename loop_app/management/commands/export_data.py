@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from loop_app.models import User
+from loop_app.transfer import export_lines
+
+
+class Command(BaseCommand):
+    help = (
+        'Export users, profiles, follows, posts, comments and likes as JSON '
+        'Lines, streaming rows as they are read.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only export this username and their content.')
+        parser.add_argument('--output', '-o', help='File to write to (default: stdout).')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--credentials', action='store_true',
+            help='Include password hashes and last logins, so imported accounts can log in.',
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f'No user named "{options["user"]}"')
+
+        out = open(options['output'], 'w', encoding='utf-8') if options['output'] else self.stdout
+        written = 0
+        try:
+            for line in export_lines(user, chunk_size=options['chunk_size'], credentials=options['credentials']):
+                out.write(line)
+                written += 1
+        finally:
+            if out is not self.stdout:
+                out.close()
+        self.stderr.write(f'Exported {written} rows')
@@ -0,0 +1,47 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from loop_app.transfer import import_lines
+
+
+class Command(BaseCommand):
+    help = (
+        'Import a JSON Lines export in batches with bulk_create, then rebuild '
+        'the hashtag/mention index once at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--skip-existing', action='store_true',
+            help='Ignore rows that conflict with ones already in the database.',
+        )
+        parser.add_argument(
+            '--no-index', action='store_true',
+            help='Do not rebuild the tag index afterwards (run backfill_tags later).',
+        )
+
+    def handle(self, *args, **options):
+        def progress(counts):
+            self.stdout.write(', '.join(f'{label}: {n}' for label, n in counts.items()))
+
+        with open(options['path'], encoding='utf-8') as f:
+            try:
+                counts, skipped = import_lines(
+                    f,
+                    batch_size=options['batch_size'],
+                    ignore_conflicts=options['skip_existing'],
+                    progress=progress if options['verbosity'] > 1 else None,
+                )
+            except IntegrityError as e:
+                raise CommandError(
+                    f'Nothing was imported: {e}. Use --skip-existing to load '
+                    'over rows that are already there.'
+                )
+        self.stdout.write(f'Imported {sum(counts.values())} rows')
+        for label, n in skipped.items():
+            self.stdout.write(f'Skipped {n} {label} rows that refer to rows not in the file')
+        if not options['no_index']:
+            call_command('backfill_tags', stdout=self.stdout)
@@ -0,0 +1,112 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from loop_app.models import User, Post, Comment, Like, Follow
+from loop_app.routers import pin_to_primary, unpin
+from loop_app.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        'Permanently remove soft-deleted posts and accounts, deleting their '
+        'comments, likes and media in small batches so no single transaction '
+        'holds the write lock for long.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running, checking for new work every --sleep seconds.',
+        )
+        parser.add_argument('--sleep', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        # A lagging replica could hide rows that still reference what is
+        # about to be deleted, so every read here goes to the primary.
+        token = pin_to_primary()
+        try:
+            while True:
+                posts = sum(self.reap_posts(alias) for alias in shard_aliases())
+                users = self.reap_users()
+                if posts or users:
+                    self.stdout.write(f'Reaped {posts} posts and {users} accounts')
+                if not options['loop']:
+                    break
+                time.sleep(options['sleep'])
+        finally:
+            unpin(token)
+
+    def delete_in_batches(self, queryset, label):
+        """
+        Deletes the rows of `queryset` a batch at a time, each batch in its
+        own transaction. Callers remove dependents first, so the collector
+        finds nothing to cascade and takes its fast path of a plain DELETE
+        unless signal receivers are connected for the model.
+        """
+        model = queryset.model
+        using = queryset.db
+        total = 0
+        while True:
+            ids = list(queryset.values_list('id', flat=True)[:self.batch_size])
+            if not ids:
+                break
+            with transaction.atomic(using=using):
+                deleted, _ = model._base_manager.using(using).filter(id__in=ids).delete()
+            total += deleted
+            self.stdout.write(f'  {label}: {total} deleted')
+        return total
+
+    def reap_posts(self, using):
+        reaped = 0
+        while True:
+            post_ids = list(
+                Post.all_objects.using(using).filter(deleted_at__isnull=False)
+                .values_list('id', flat=True)[:self.batch_size]
+            )
+            if not post_ids:
+                break
+
+            comments = Comment.objects.using(using).filter(post_id__in=post_ids)
+            self.delete_in_batches(Like.objects.using(using).filter(comment__in=comments), 'comment likes')
+            self.delete_in_batches(Like.objects.using(using).filter(post_id__in=post_ids), 'post likes')
+            self.delete_in_batches(comments, 'comments')
+
+            posts = list(Post.all_objects.using(using).filter(id__in=post_ids))
+            files = [
+                field for post in posts
+                for field in (post.image, post.video) if field
+            ]
+            # Only small leftovers remain, so the regular delete is cheap and
+            # still cascades to any relation added later.
+            with transaction.atomic(using=using):
+                Post.all_objects.using(using).filter(id__in=post_ids).delete()
+            for field in files:
+                field.storage.delete(field.name)
+
+            reaped += len(post_ids)
+            self.stdout.write(f'Posts on {using}: {reaped} reaped')
+        return reaped
+
+    def reap_users(self):
+        reaped = 0
+        # Their posts were soft-deleted with the account and are gone by now.
+        for user in list(User.objects.filter(deleted_at__isnull=False)):
+            # They may have commented on and liked posts on any shard.
+            for using in shard_aliases():
+                comments = Comment.objects.using(using).filter(user=user)
+                self.delete_in_batches(Like.objects.using(using).filter(comment__in=comments), 'likes on their comments')
+                self.delete_in_batches(Like.objects.using(using).filter(user=user), 'their likes')
+                self.delete_in_batches(comments, 'their comments')
+            self.delete_in_batches(Follow.objects.filter(follower=user), 'follows')
+            self.delete_in_batches(Follow.objects.filter(following=user), 'followers')
+            picture = user.profile_picture
+            user.delete()
+            if picture:
+                picture.storage.delete(picture.name)
+            reaped += 1
+            self.stdout.write(f'Accounts: {reaped} reaped')
+        return reaped
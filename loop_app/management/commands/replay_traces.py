@@ -0,0 +1,318 @@
+import json
+import statistics
+import time
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from importlib import import_module
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import NoReverseMatch, reverse
+from django.utils.crypto import get_random_string
+
+from loop_app.models import User
+from loop_app.traces import read_traces
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Status recorded for traces whose route does not exist in this build.
+UNROUTABLE = -1
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    # A redirect (e.g. to the login page) is the response being measured.
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class ReplayUser:
+    """A local user standing in for one pseudonymous user of the traces."""
+
+    def __init__(self, user, session_key):
+        self.id = user.id
+        self.username = user.username
+        self.profile_id = user.user_profile.pk
+        self.csrf_token = get_random_string(32)
+        self.cookies = {
+            settings.SESSION_COOKIE_NAME: session_key,
+            settings.CSRF_COOKIE_NAME: self.csrf_token,
+        }
+
+    def cookie_header(self):
+        return '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+
+    def update(self, set_cookie_headers):
+        # Keeps cookies such as the primary-pinning one, as a browser would.
+        for header in set_cookie_headers:
+            for name, morsel in SimpleCookie(header).items():
+                if morsel['max-age'] == '0' or not morsel.value:
+                    self.cookies.pop(name, None)
+                else:
+                    self.cookies[name] = morsel.value
+
+
+class Personas:
+    """Assigns each pseudonym in the traces to a local user, in order of appearance."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.assigned = {}
+        self.texts = 0
+
+    def get(self, pseudonym):
+        if pseudonym not in self.assigned:
+            self.assigned[pseudonym] = self.pool[len(self.assigned) % len(self.pool)]
+        return self.assigned[pseudonym]
+
+    def text(self, length):
+        # Search terms are recorded by length only; prefixes of local
+        # usernames make queries that match something.
+        username = self.pool[self.texts % len(self.pool)].username
+        self.texts += 1
+        return (username * length)[:length]
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay request traces recorded by RequestTraceMiddleware against a '
+        'running server and report latency per route. Save the results of two '
+        'builds with --save and diff them with --compare.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='Trace files or directories.')
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument(
+            '--speedup', type=float, default=1.0,
+            help='Replay this many times faster than recorded.',
+        )
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--users', type=int, default=100,
+            help='Number of local users to replay the traced users as.',
+        )
+        parser.add_argument('--timeout', type=float, default=10.0)
+        parser.add_argument('--limit', type=int, help='Only replay the first N traces.')
+        parser.add_argument('--save', help='Write the results to this JSON file.')
+        parser.add_argument(
+            '--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'),
+            help='Compare two files written by --save instead of replaying.',
+        )
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            self.compare(*options['compare'])
+            return
+        if not options['paths']:
+            raise CommandError('Give trace files or directories to replay, or --compare.')
+
+        self.base_url = options['base_url'].rstrip('/')
+        self.timeout = options['timeout']
+        self.opener = urllib.request.build_opener(NoRedirect)
+        personas = Personas(self.create_sessions(options['users']))
+
+        started = time.monotonic()
+        results, lags = self.replay(read_traces(options['paths']), personas, options)
+        duration = time.monotonic() - started
+
+        self.report(results, duration)
+        if lags:
+            lag = sorted(lags)[int(len(lags) * 0.99) - 1] if len(lags) > 1 else lags[0]
+            if lag > 0.1:
+                self.stdout.write(self.style.WARNING(
+                    f'p99 start delay was {lag * 1000:.0f} ms: the client fell behind '
+                    'the schedule, raise --concurrency or lower --speedup.'
+                ))
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as f:
+                json.dump({
+                    'base_url': self.base_url,
+                    'speedup': options['speedup'],
+                    'duration': duration,
+                    'results': results,
+                }, f)
+            self.stdout.write(f'Saved {len(results)} results to {options["save"]}')
+
+    def create_sessions(self, count):
+        """
+        Logs in up to `count` local users by creating their sessions directly,
+        which skips the login throttle. The server must share this database.
+        """
+        users = list(
+            User.objects.filter(is_active=True, deleted_at__isnull=True)
+            .select_related('user_profile').order_by('id')[:count]
+        )
+        if not users:
+            raise CommandError('No users to replay as; load some data first (import_data).')
+        SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+        pool = []
+        for user in users:
+            session = SessionStore()
+            session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+            session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            pool.append(ReplayUser(user, session.session_key))
+        return pool
+
+    def build(self, trace, personas):
+        kwargs = {}
+        for name, value in trace['kwargs'].items():
+            if isinstance(value, dict) and 'user' in value:
+                user = personas.get(value['user'])
+                value = user.username if name == 'username' else user.id
+            elif isinstance(value, dict) and 'profile' in value:
+                value = personas.get(value['profile']).profile_id
+            elif isinstance(value, dict) and 'mention' in value:
+                value = '@' + personas.get(value['mention']).username
+            kwargs[name] = value
+
+        params = {}
+        for name, value in trace['params'].items():
+            if isinstance(value, dict) and 'user' in value:
+                value = personas.get(value['user']).username
+            elif isinstance(value, dict):
+                value = personas.text(value['len'])
+            params[name] = value
+
+        url = self.base_url + reverse(trace['route'], kwargs=kwargs)
+        if params:
+            url += '?' + urlencode(params)
+        client = personas.get(trace['user']) if trace['user'] else None
+        body = None
+        if trace.get('body_bytes'):
+            # Only the size of the body was recorded.
+            body = json.dumps({'content': 'x' * max(1, trace['body_bytes'] - 16)}).encode()
+        return url, client, body
+
+    def send(self, method, url, client, body):
+        headers = {'Accept': 'application/json'}
+        if client is not None:
+            headers['Cookie'] = client.cookie_header()
+            if method not in SAFE_METHODS:
+                headers['X-CSRFToken'] = client.csrf_token
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        request = urllib.request.Request(url, data=body, headers=headers, method=method)
+
+        start = time.perf_counter()
+        set_cookie = []
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                response.read()
+                status = response.status
+                set_cookie = response.headers.get_all('Set-Cookie') or []
+        except HTTPError as e:
+            e.read()
+            status = e.code
+            set_cookie = e.headers.get_all('Set-Cookie') or []
+        except (URLError, OSError):
+            status = 0
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if client is not None and set_cookie:
+            client.update(set_cookie)
+        return status, elapsed_ms
+
+    def replay(self, traces, personas, options):
+        results = []
+        lags = []
+
+        def run(index, trace, url, client, body, due):
+            lags.append(max(0.0, time.monotonic() - due))
+            status, elapsed_ms = self.send(trace['method'], url, client, body)
+            results.append([index, trace['method'], trace['route'], status, round(elapsed_ms, 2)])
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            start = time.monotonic()
+            first_ts = None
+            for index, trace in enumerate(traces):
+                if options['limit'] is not None and index >= options['limit']:
+                    break
+                if first_ts is None:
+                    first_ts = trace['ts']
+                due = start + (trace['ts'] - first_ts) / options['speedup']
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                try:
+                    url, client, body = self.build(trace, personas)
+                except NoReverseMatch:
+                    results.append([index, trace['method'], trace['route'], UNROUTABLE, 0.0])
+                    continue
+                executor.submit(run, index, trace, url, client, body, due)
+
+        results.sort()
+        return results, lags
+
+    def by_route(self, results):
+        routes = defaultdict(list)
+        for index, method, route, status, elapsed_ms in results:
+            routes[f'{method} {route}'].append((status, elapsed_ms))
+        return routes
+
+    def percentiles(self, samples):
+        if len(samples) < 2:
+            return (samples[0],) * 3 if samples else (0.0,) * 3
+        q = statistics.quantiles(samples, n=100, method='inclusive')
+        return q[49], q[94], q[98]
+
+    def report(self, results, duration):
+        self.stdout.write(
+            f'{len(results)} requests in {duration:.1f} s '
+            f'({len(results) / duration if duration else 0:.1f}/s)'
+        )
+        self.stdout.write(
+            f"{'route':<24} {'requests':>8} {'5xx/err':>8} {'4xx':>6} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        )
+        for key, rows in sorted(self.by_route(results).items()):
+            samples = [elapsed_ms for status, elapsed_ms in rows if status > 0]
+            errors = sum(1 for status, _ in rows if status >= 500 or status <= 0)
+            client_errors = sum(1 for status, _ in rows if 400 <= status < 500)
+            p50, p95, p99 = self.percentiles(samples)
+            self.stdout.write(
+                f'{key:<24} {len(rows):>8} {errors:>8} {client_errors:>6} '
+                f'{p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {max(samples, default=0):>8.1f}'
+            )
+
+    def compare(self, baseline_path, candidate_path):
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(candidate_path, encoding='utf-8') as f:
+            candidate = json.load(f)
+
+        self.stdout.write(f'{baseline_path} -> {candidate_path}')
+        self.stdout.write(
+            f"{'route':<24} {'p50 ms':>17} {'p99 ms':>17} {'change':>7} {'errors':>9}"
+        )
+        before = self.by_route(baseline['results'])
+        after = self.by_route(candidate['results'])
+        for key in sorted(set(before) | set(after)):
+            a, b = before.get(key, []), after.get(key, [])
+            a50, _, a99 = self.percentiles([ms for status, ms in a if status > 0])
+            b50, _, b99 = self.percentiles([ms for status, ms in b if status > 0])
+            change = f'{(b99 - a99) / a99 * 100:+.0f}%' if a99 else '-'
+            a_errors = sum(1 for status, _ in a if status >= 500 or status <= 0)
+            b_errors = sum(1 for status, _ in b if status >= 500 or status <= 0)
+            self.stdout.write(
+                f'{key:<24} {a50:>8.1f}{b50:>9.1f} {a99:>8.1f}{b99:>9.1f} '
+                f'{change:>7} {a_errors:>4}{b_errors:>5}'
+            )
+
+        # The same trace answered differently by the two builds.
+        statuses = {index: status for index, _, _, status, _ in baseline['results']}
+        changed = Counter(
+            (f'{method} {route}', statuses[index], status)
+            for index, method, route, status, _ in candidate['results']
+            if index in statuses and statuses[index] != status
+        )
+        if not changed:
+            self.stdout.write('Every request got the same status from both builds.')
+            return
+        self.stdout.write('Status changes (baseline -> candidate):')
+        for (key, before_status, after_status), count in changed.most_common(20):
+            self.stdout.write(f'  {key:<24} {before_status} -> {after_status}: {count}')
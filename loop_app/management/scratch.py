@@ -0,0 +1,32 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import setup_databases, teardown_databases
+
+
+@contextmanager
+def scratch_databases(aliases=None):
+    """
+    Sets up test databases for `aliases` (default: every configured one) for
+    the bench_* commands and removes them afterwards.
+
+    They are files in a temporary directory rather than the in-memory
+    databases the test runner uses, which serialise every connection on
+    table locks and would hide what is being measured. Mirrors, such as the
+    replica, point at their primary's file.
+    """
+    directory = tempfile.mkdtemp()
+    for alias in aliases or list(connections):
+        test_settings = connections[alias].settings_dict['TEST']
+        if not test_settings.get('MIRROR'):
+            test_settings['NAME'] = os.path.join(directory, f'{alias}.sqlite3')
+    old_config = setup_databases(verbosity=0, interactive=False, aliases=aliases)
+    try:
+        yield
+    finally:
+        connections.close_all()
+        teardown_databases(old_config, verbosity=0)
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,25 @@
+from django.core.cache import cache
+
+METRICS_KEY_PREFIX = 'metrics'
+# Counters are kept for a day so a dashboard scraping them never misses one.
+METRICS_TIMEOUT = 60 * 60 * 24
+
+
+def _key(name):
+    return f'{METRICS_KEY_PREFIX}:{name}'
+
+
+def incr(name, amount=1):
+    """Increments a shared counter in the cache, creating it if needed."""
+    key = _key(name)
+    if not cache.add(key, amount, timeout=METRICS_TIMEOUT):
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            # The key expired between add() and incr().
+            cache.set(key, amount, timeout=METRICS_TIMEOUT)
+
+
+def snapshot(names):
+    values = cache.get_many([_key(name) for name in names])
+    return {name: values.get(_key(name), 0) for name in names}
@@ -0,0 +1,207 @@
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+
+from . import metrics
+from .routers import pin_to_primary, unpin
+from .traces import TRACED_ROUTES, TraceLog, anonymize, pseudonym
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Latest in-flight count, p99 and queue wait seen by this process's
+# LoadSheddingMiddleware.
+current_load = {'in_flight': 0, 'p99_ms': 0.0, 'queue_ms': 0.0}
+
+
+class PrimaryPinningMiddleware:
+    """
+    Keeps a client on the primary database for a short while after it writes,
+    so it never reads a replica that has not caught up with its own change.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cookie_name = getattr(settings, 'REPLICA_PIN_COOKIE', 'pin_primary')
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+    def __call__(self, request):
+        writing = request.method not in SAFE_METHODS
+        token = None
+        if writing or self.cookie_name in request.COOKIES:
+            token = pin_to_primary()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                unpin(token)
+
+        if writing and response.status_code < 400:
+            response.set_cookie(
+                self.cookie_name, '1',
+                max_age=self.pin_seconds,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class LoadSheddingMiddleware:
+    """
+    Rejects requests early with a 503 and Retry-After when this process is
+    overloaded, instead of letting every request get slow.
+
+    Overload means too long a wait in the front-end queue, too many
+    requests in flight or a p99 latency over the limit. Low-priority routes
+    (search, feeds, likes) are shed at half the queue and in-flight limits
+    or on high latency; everything else only at the full limits.
+
+    The in-flight count is per process. Under gunicorn's sync workers each
+    process handles one request at a time, so it never goes above 1 and
+    requests pile up in the listen backlog instead. That backlog is what
+    the queue wait measures: the proxy stamps each request with
+    X-Request-Start (for nginx, `proxy_set_header X-Request-Start
+    "t=${msec}";`) and the time since then is how long it waited for a
+    worker. Without the header only the in-flight and latency checks apply,
+    which suits threaded or async workers.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, 'LOAD_SHEDDING', {})
+        self.max_in_flight = config.get('MAX_IN_FLIGHT', 64)
+        self.p99_limit = config.get('P99_MS', 2000) / 1000
+        self.queue_limit = config.get('MAX_QUEUE_MS', 500) / 1000
+        self.retry_after = config.get('RETRY_AFTER', 2)
+        self.window_seconds = config.get('LATENCY_WINDOW_SECONDS', 30)
+        self.low_priority_routes = set(config.get('LOW_PRIORITY_ROUTES', []))
+        self.samples = deque(maxlen=config.get('LATENCY_SAMPLES', 1000))
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.p99 = 0.0
+        self.p99_computed_at = 0.0
+
+    def __call__(self, request):
+        with self.lock:
+            self.in_flight += 1
+        start = time.monotonic()
+        try:
+            return self.get_response(request)
+        finally:
+            finished = time.monotonic()
+            with self.lock:
+                self.in_flight -= 1
+                if not getattr(request, '_shed', False):
+                    self.samples.append((finished, finished - start))
+
+    def current_p99(self):
+        # Sorting the window on every request would cost more than it saves,
+        # so the value is refreshed at most once a second. Old samples age
+        # out, so shedding stops once slow requests stop arriving.
+        now = time.monotonic()
+        if now - self.p99_computed_at >= 1:
+            with self.lock:
+                recent = sorted(
+                    elapsed for finished, elapsed in self.samples
+                    if now - finished <= self.window_seconds
+                )
+            self.p99 = recent[max(0, int(len(recent) * 0.99) - 1)] if recent else 0.0
+            self.p99_computed_at = now
+            current_load.update(
+                in_flight=self.in_flight,
+                p99_ms=round(self.p99 * 1000, 1),
+            )
+        return self.p99
+
+    def queue_wait(self, request):
+        """
+        Seconds since the proxy received the request, from X-Request-Start,
+        or 0 without the header. Accepts seconds (nginx's `t=${msec}`),
+        milliseconds or microseconds since the epoch.
+        """
+        header = request.META.get('HTTP_X_REQUEST_START', '')
+        try:
+            started = float(header.removeprefix('t='))
+        except ValueError:
+            return 0.0
+        if started > 1e14:
+            started /= 1e6
+        elif started > 1e11:
+            started /= 1e3
+        wait = max(0.0, time.time() - started)
+        current_load['queue_ms'] = round(wait * 1000, 1)
+        return wait
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route = request.resolver_match.url_name if request.resolver_match else None
+        low_priority = route in self.low_priority_routes
+        queue_wait = self.queue_wait(request)
+        if low_priority:
+            overloaded = (
+                queue_wait > self.queue_limit / 2
+                or self.in_flight > self.max_in_flight // 2
+                or self.current_p99() > self.p99_limit
+            )
+        else:
+            overloaded = (
+                queue_wait > self.queue_limit
+                or self.in_flight > self.max_in_flight
+            )
+
+        if not overloaded:
+            return None
+
+        request._shed = True
+        metrics.incr(f"shed:{'low' if low_priority else 'normal'}")
+        response = JsonResponse(
+            {'detail': 'Server is busy, please retry shortly.'},
+            status=503,
+        )
+        response['Retry-After'] = str(self.retry_after)
+        return response
+
+
+class RequestTraceMiddleware:
+    """
+    Records a sample of API requests, anonymized, for replaying against a
+    candidate build with `manage.py replay_traces`. Off unless
+    TRACE_REQUESTS['ENABLED'] is set.
+
+    Signed-in users are sampled as a whole, so a replay sees complete
+    sessions rather than scattered requests; anonymous requests are sampled
+    one by one.
+    """
+
+    def __init__(self, get_response):
+        config = getattr(settings, 'TRACE_REQUESTS', {})
+        if not config.get('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = config.get('SAMPLE_RATE', 0.01)
+        self.routes = set(config.get('ROUTES') or TRACED_ROUTES)
+        self.log = TraceLog(
+            config.get('DIR', settings.BASE_DIR / 'traces'),
+            max_bytes=config.get('MAX_BYTES', 50 * 1024 * 1024),
+            backup_count=config.get('BACKUP_COUNT', 10),
+        )
+
+    def __call__(self, request):
+        started = time.time()
+        start = time.perf_counter()
+        response = self.get_response(request)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        match = request.resolver_match
+        if match is not None and match.url_name in self.routes and self.sampled(request):
+            self.log.write(anonymize(request, response, started, elapsed_ms))
+        return response
+
+    def sampled(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return int(pseudonym(user.pk)[:8], 16) < self.sample_rate * 0x100000000
+        return random.random() < self.sample_rate
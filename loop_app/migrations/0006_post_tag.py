@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loop_app', '0005_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('hashtag', 'Hashtag'), ('mention', 'Mention')], max_length=10)),
+                ('tag', models.CharField(max_length=150)),
+                ('created_at', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tags', to='loop_app.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'tag', '-created_at'], name='posttag_lookup_idx')],
+                'unique_together': {('post', 'kind', 'tag')},
+            },
+        ),
+    ]
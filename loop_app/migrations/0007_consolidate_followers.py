@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:11
+
+from itertools import islice
+
+from django.db import migrations
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def consolidate_followers(apps, schema_editor):
+    """
+    Gives every user a profile and moves the UserProfile.followers M2M rows
+    into Follow, which becomes the only follower graph.
+    """
+    User = apps.get_model('loop_app', 'User')
+    UserProfile = apps.get_model('loop_app', 'UserProfile')
+    Follow = apps.get_model('loop_app', 'Follow')
+    db = schema_editor.connection.alias
+
+    missing = User.objects.using(db).filter(user_profile__isnull=True)
+    for user_ids in batched(missing.values_list('id', flat=True).iterator(chunk_size=2000), 500):
+        UserProfile.objects.using(db).bulk_create(
+            [UserProfile(user_id=user_id) for user_id in user_ids],
+        )
+
+    Through = UserProfile.followers.through
+    rows = Through.objects.using(db).values_list('user_id', 'userprofile__user_id')
+    follows = (
+        Follow(follower_id=follower_id, following_id=following_id)
+        for follower_id, following_id in rows.iterator(chunk_size=2000)
+        if follower_id != following_id
+    )
+    for batch in batched(follows, 500):
+        Follow.objects.using(db).bulk_create(batch, ignore_conflicts=True)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loop_app', '0006_post_tag'),
+    ]
+
+    operations = [
+        migrations.RunPython(consolidate_followers, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='followers',
+        ),
+    ]
@@ -1,11 +1,18 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .ids import next_id, shard_index_of
+from .sharding import shard_for_id, shard_index_for_user, shards_for_user
+from .tags import HASHTAG, MENTION, extract_tags
 
 class User(AbstractUser):
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
     bio = models.TextField(max_length=500, blank=True)
     website = models.URLField(blank=True)
     location = models.CharField(max_length=100, blank=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
     
     class Meta:
         app_label = 'loop_app'  
@@ -13,27 +20,130 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def pending_deletion_ids(cls):
+        """
+        Ids of soft-deleted accounts whose rows reap_deleted has not removed
+        yet. Read paths leave out their comments, likes and follows. Users
+        live on 'default', so on a shard this list stands in for a join.
+        """
+        return set(cls._base_manager.filter(deleted_at__isnull=False).values_list('id', flat=True))
+
+    def soft_delete(self):
+        """
+        Deactivates the account and hides it, its posts and what it did on
+        other people's posts right away. The rows are removed later, in
+        batches, by `manage.py reap_deleted`.
+        """
+        now = timezone.now()
+        self.is_active = False
+        self.deleted_at = now
+        self.save(update_fields=['is_active', 'deleted_at'])
+        for using in shards_for_user(self.pk):
+            Post.all_objects.using(using).filter(
+                user=self, deleted_at__isnull=True,
+            ).update(deleted_at=now)
+
+class UserProfileQuerySet(models.QuerySet):
+    def with_counts(self):
+        """
+        Joins the user and annotates follower/following counts from Follow,
+        so a page of profiles is read in a single query.
+        """
+        followers = (
+            Follow.objects.filter(following=models.OuterRef('user'), follower__deleted_at__isnull=True)
+            .order_by().values('following')
+            .annotate(n=models.Count('*')).values('n')
+        )
+        following = (
+            Follow.objects.filter(follower=models.OuterRef('user'), following__deleted_at__isnull=True)
+            .order_by().values('follower')
+            .annotate(n=models.Count('*')).values('n')
+        )
+        return self.select_related('user').annotate(
+            followers_count=Coalesce(models.Subquery(followers), 0),
+            following_count=Coalesce(models.Subquery(following), 0),
+        )
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='user_profile')
-    followers = models.ManyToManyField(User, related_name='following', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    @property
-    def followers_count(self):
-        return self.user.followers.count()
-    
-    @property
-    def following_count(self):
-        return self.user.follows.count()
+    objects = UserProfileQuerySet.as_manager()
+
+class ShardedModel(models.Model):
+    """
+    Base for rows partitioned by author. Subclasses define shard_index();
+    new rows get a generated id that encodes it, and are written to the
+    shard that id names.
+    """
 
-class Post(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding or self.pk is not None:
+            return super().save(*args, **kwargs)
+        kwargs['force_insert'] = True
+        for attempt in range(3):
+            self.pk = next_id(self.shard_index())
+            # The id decides the shard, whatever alias Manager.create() or a
+            # related instance suggested. With one shard it is left as given.
+            kwargs['using'] = (
+                shard_for_id(self.pk) or kwargs.get('using')
+                or router.db_for_write(type(self), instance=self)
+            )
+            try:
+                with transaction.atomic(using=kwargs['using']):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Only an id taken by another process in the same millisecond
+                # is worth another try; anything else is a real error.
+                taken = type(self)._base_manager.using(kwargs['using']).filter(pk=self.pk).exists()
+                if not taken or attempt == 2:
+                    raise
+
+class PostQuerySet(models.QuerySet):
+    def with_counts(self):
+        """
+        Annotates like and comment counts with correlated subqueries, so
+        they are only computed for the rows a LIMIT keeps rather than
+        grouped over the whole table. Likes and comments sit on their
+        post's shard, so this works on any alias.
+        """
+        hidden = User.pending_deletion_ids()
+        likes = (
+            Like.objects.filter(post=models.OuterRef('pk')).exclude(user_id__in=hidden)
+            .order_by().values('post')
+            .annotate(n=models.Count('*')).values('n')
+        )
+        comments = (
+            Comment.objects.filter(post=models.OuterRef('pk')).exclude(user_id__in=hidden)
+            .order_by().values('post')
+            .annotate(n=models.Count('*')).values('n')
+        )
+        return self.annotate(
+            likes_count=Coalesce(models.Subquery(likes), 0),
+            comments_count=Coalesce(models.Subquery(comments), 0),
+        )
+
+class VisiblePostManager(models.Manager.from_queryset(PostQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+class Post(ShardedModel):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts', db_constraint=False)
     content = models.TextField(blank=True)
     image = models.ImageField(upload_to='posts/images/', blank=True, null=True)
     video = models.FileField(upload_to='posts/videos/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    # Soft-deleted posts are hidden everywhere except from all_objects.
+    objects = VisiblePostManager()
+    all_objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at'] 
@@ -41,18 +151,32 @@ class Post(models.Model):
     def __str__(self):
         return f"Post by {self.user.username}"
 
-class Comment(models.Model):
+    def soft_delete(self):
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at'])
+
+    def shard_index(self):
+        return shard_index_for_user(self.user_id)
+
+class Comment(ShardedModel):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
-class Like(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    def shard_index(self):
+        # Next to the post; posts from before sharding are on shard 0.
+        return shard_index_of(self.post_id) or 0
+
+class Like(ShardedModel):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False)
     post = models.ForeignKey(Post, on_delete=models.CASCADE, null=True, blank=True, related_name='likes')
     comment = models.ForeignKey(Comment, on_delete=models.CASCADE, null=True, blank=True, related_name='likes')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def shard_index(self):
+        return shard_index_of(self.post_id or self.comment_id) or 0
+
 class Follow(models.Model):
     follower = models.ForeignKey(User, on_delete=models.CASCADE, related_name='follows')
     following = models.ForeignKey(User, on_delete=models.CASCADE, related_name='followers')
@@ -62,4 +186,37 @@ class Follow(models.Model):
         unique_together = ['follower', 'following']
     
     def __str__(self):
-        return f"{self.follower.username} follows {self.following.username}"
\ No newline at end of file
+        return f"{self.follower.username} follows {self.following.username}"
+
+
+class PostTag(models.Model):
+    """
+    Inverted index from a hashtag or @mention to the posts that use it,
+    newest first, so tag pages are index range scans instead of LIKE scans.
+    """
+    KIND_CHOICES = [(HASHTAG, 'Hashtag'), (MENTION, 'Mention')]
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='tags')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    tag = models.CharField(max_length=150)
+    # Copy of post.created_at so the index alone gives recency order.
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['post', 'kind', 'tag']
+        indexes = [
+            models.Index(fields=['kind', 'tag', '-created_at'], name='posttag_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.tag} -> post {self.post_id}"
+
+    @classmethod
+    def index_post(cls, post):
+        """Replaces the index entries for `post` with the tags in its content."""
+        using = post._state.db
+        cls.objects.using(using).filter(post=post).delete()
+        cls.objects.using(using).bulk_create(
+            cls(post=post, kind=kind, tag=tag, created_at=post.created_at)
+            for kind, tag in extract_tags(post.content)
+        )
@@ -0,0 +1,112 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from .sharding import SHARDED_MODELS, is_sharded, shard_aliases, shard_for_id, shard_for_user
+
+
+# Set by PrimaryPinningMiddleware while a request must read its own writes.
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+
+REPLICATED_MODELS = {'post', 'comment', 'like', 'follow'}
+
+
+def pin_to_primary():
+    return _pinned_to_primary.set(True)
+
+
+def unpin(token):
+    _pinned_to_primary.reset(token)
+
+
+def is_pinned_to_primary():
+    return _pinned_to_primary.get()
+
+
+class ReadReplicaRouter:
+    """
+    Sends reads of the feed models to a replica alias and everything else,
+    including all writes, to the primary ('default') database.
+    """
+
+    def _is_replicated(self, model):
+        return (
+            model._meta.app_label == 'loop_app'
+            and model._meta.model_name in REPLICATED_MODELS
+        )
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if not replicas or is_pinned_to_primary() or not self._is_replicated(model):
+            return 'default'
+        # Reads inside an open transaction must see that transaction's writes.
+        if connections['default'].in_atomic_block:
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so every alias holds the same rows.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ShardRouter:
+    """
+    Routes posts, comments, likes and tag rows to their author's shard.
+
+    Most sharded queries pick their shard explicitly with .using(); this
+    router covers saves and related-object access, where Django passes the
+    instance as a hint. Anything it cannot place falls through to
+    ReadReplicaRouter.
+    """
+
+    def _is_sharded_model(self, model):
+        return model._meta.app_label == 'loop_app' and model._meta.model_name in SHARDED_MODELS
+
+    def _db_for_instance(self, model, instance):
+        if instance is None or not self._is_sharded_model(model):
+            return None
+        # Going through _meta rather than type() also sees through the
+        # SimpleLazyObject that request.user is.
+        if self._is_sharded_model(instance):
+            # The id names the shard; unsaved rows have none yet.
+            if instance.pk is not None:
+                return shard_for_id(instance.pk)
+            return instance._state.db
+        if (
+            model._meta.model_name == 'post'
+            and instance._meta.model_name == 'user'
+            and instance.pk is not None
+        ):
+            # user.posts: the author's own shard. Posts from before sharding
+            # are on 'default'; use sharding.for_author() to see both. A
+            # user's comments and likes follow other people's posts, so a
+            # user says nothing about where those live.
+            return shard_for_user(instance.pk)
+        return None
+
+    def db_for_read(self, model, **hints):
+        if not is_sharded():
+            return None
+        return self._db_for_instance(model, hints.get('instance'))
+
+    def db_for_write(self, model, **hints):
+        if not is_sharded():
+            return None
+        return self._db_for_instance(model, hints.get('instance'))
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Rows point at users on 'default' without a database constraint.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == 'default' or db not in shard_aliases():
+            return None
+        return app_label == 'loop_app' and model_name in SHARDED_MODELS
@@ -14,6 +14,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'password', 'first_name', 'last_name']
     
     def create(self, validated_data):
+        # The profile is created by the post_save signal in signals.py.
         user = User.objects.create_user(
             username=validated_data['username'],
             email=validated_data.get('email', ''),
@@ -36,18 +37,13 @@ class UserProfileSerializer(serializers.ModelSerializer):
     bio = serializers.CharField(source='user.bio', read_only=True)
     website = serializers.URLField(source='user.website', read_only=True)
     location = serializers.CharField(source='user.location', read_only=True)
-    followers_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
+    # Annotated by UserProfile.objects.with_counts().
+    followers_count = serializers.IntegerField(read_only=True)
+    following_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = UserProfile
         fields = ['id', 'username', 'email', 'profile_picture', 'bio', 'website', 'location', 'followers_count', 'following_count', 'created_at']
-    
-    def get_followers_count(self, obj):
-        return obj.followers.count()
-    
-    def get_following_count(self, obj):
-        return obj.user.following.count()
 
 class UserLoginSerializer(serializers.Serializer):
     username = serializers.CharField()
@@ -81,7 +77,7 @@ class CommentSerializer(serializers.ModelSerializer):
 
 class PostSerializer(serializers.ModelSerializer):
     user = UserSimpleSerializer(read_only=True)  
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
     likes_count = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
     
@@ -89,12 +85,27 @@ class PostSerializer(serializers.ModelSerializer):
         model = Post
         fields = ['id', 'user', 'content', 'image', 'created_at', 'likes_count', 'comments_count', 'comments']
         read_only_fields = ['user', 'created_at']
+
+    def hidden_user_ids(self):
+        # Looked up once per response rather than once per post.
+        root = self.root
+        if not hasattr(root, '_hidden_user_ids'):
+            root._hidden_user_ids = User.pending_deletion_ids()
+        return root._hidden_user_ids
+
+    def visible_comments(self, obj):
+        # Filtered in Python, so comments prefetched by the list views are used.
+        hidden = self.hidden_user_ids()
+        return [comment for comment in obj.comments.all() if comment.user_id not in hidden]
+
+    def get_comments(self, obj):
+        return CommentSerializer(self.visible_comments(obj), many=True, context=self.context).data
     
     def get_likes_count(self, obj):
-        return obj.likes.count()
+        return obj.likes.exclude(user_id__in=self.hidden_user_ids()).count()
     
     def get_comments_count(self, obj):
-        return obj.comments.count()
+        return len(self.visible_comments(obj))
 
 class LikeSerializer(serializers.ModelSerializer):
     user = UserSimpleSerializer(read_only=True)  
@@ -119,29 +130,15 @@ class UserSearchSerializer(serializers.ModelSerializer):
     email = serializers.CharField(source='user.email')
     bio = serializers.CharField(source='user.bio')
     profile_picture = serializers.ImageField(source='user.profile_picture')
-    followers_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
-    is_following = serializers.SerializerMethodField()
+    # Annotated by UserSearchView.get_queryset().
+    followers_count = serializers.IntegerField(read_only=True)
+    following_count = serializers.IntegerField(read_only=True)
+    is_following = serializers.BooleanField(read_only=True)
     
     class Meta:
         model = UserProfile
         fields = ['id', 'username', 'email', 'bio', 'profile_picture', 'followers_count', 'following_count', 'is_following']
     
-    def get_followers_count(self, obj):
-        return obj.followers_count
-    
-    def get_following_count(self, obj):
-        return obj.following_count
-    
-    def get_is_following(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Follow.objects.filter(
-                follower=request.user, 
-                following=obj.user
-            ).exists()
-        return False
-    
 
 class FollowUserView(APIView):
     def post(self, request, user_id):
@@ -0,0 +1,138 @@
+"""
+Helpers for partitioning posts, comments, likes and tags by author.
+
+A post lives on the shard of its author (user_id % number of shards), and
+its comments, likes and tag index rows live next to it. Users, profiles and
+follows stay on 'default', which is also shard 0 and keeps every row written
+before sharding. With a single shard, every helper here is a no-op and
+queries run exactly as before.
+"""
+import heapq
+from operator import attrgetter
+
+from django.conf import settings
+
+from .ids import shard_index_of
+
+SHARDED_MODELS = {'post', 'comment', 'like', 'posttag'}
+
+
+def shard_aliases():
+    return getattr(settings, 'DATABASE_SHARDS', None) or ['default']
+
+
+def is_sharded():
+    return len(shard_aliases()) > 1
+
+
+def shard_index_for_user(user_id):
+    return user_id % len(shard_aliases())
+
+
+def shard_for_user(user_id):
+    """
+    Returns the alias of the author's shard, or None with a single shard so
+    that .using() leaves reads to the routers (and the replicas).
+    """
+    if not is_sharded():
+        return None
+    return shard_aliases()[shard_index_for_user(user_id)]
+
+
+def shards_for_user(user_id):
+    """
+    Every alias that can hold this author's posts: their own shard, and
+    'default' for posts written before sharding was turned on.
+    """
+    home = shard_aliases()[shard_index_for_user(user_id)]
+    return [home] if home == 'default' else [home, 'default']
+
+
+def shard_for_id(object_id):
+    """
+    Returns the alias holding the post, comment or like with this id, or
+    None with a single shard, like shard_for_user().
+    """
+    if not is_sharded():
+        return None
+    index = shard_index_of(int(object_id))
+    if index is None or index >= len(shard_aliases()):
+        # Rows from before sharding stay on 'default'.
+        return 'default'
+    return shard_aliases()[index]
+
+
+def with_authors(queryset):
+    # Users live on 'default', so they cannot be joined from another shard.
+    if is_sharded():
+        return queryset.prefetch_related('user')
+    return queryset.select_related('user')
+
+
+def for_author(queryset, user_id):
+    """Narrows a post queryset to one author and to the shards holding them."""
+    queryset = queryset.filter(user_id=user_id)
+    if not is_sharded():
+        return queryset
+    return across_shards(queryset, {
+        alias: queryset.using(alias) for alias in shards_for_user(user_id)
+    })
+
+
+def across_shards(queryset, querysets=None):
+    """
+    Runs `queryset` on every shard and merges the results by its ordering.
+    Pass `querysets` ({alias: queryset}) when each shard needs its own filter.
+    """
+    if querysets is None:
+        if not is_sharded():
+            return queryset
+        querysets = {alias: queryset.using(alias) for alias in shard_aliases()}
+    return MergedQuerySet(querysets)
+
+
+class MergedQuerySet:
+    """
+    Read-only scatter-gather over one queryset per shard, sorted on a
+    single ordering field. Supports what the paginators need: count(),
+    slicing and iteration.
+
+    Any shard could hold all of rows [start:stop], so a slice reads `stop`
+    rows from every shard and merges them in Python: page N of a feed
+    costs N * page_size rows per shard. That is fine for the first few
+    pages people actually scroll through, but deep pages get linearly more
+    expensive; count() is one COUNT query per shard.
+    """
+    ordered = True
+
+    def __init__(self, querysets):
+        self.querysets = querysets
+        first = next(iter(querysets.values()))
+        order_by = first.query.order_by or first.model._meta.ordering
+        if len(order_by) != 1:
+            raise ValueError('MergedQuerySet needs exactly one ordering field')
+        field = order_by[0]
+        self.reverse = field.startswith('-')
+        self.key = attrgetter(field.lstrip('-'))
+        self.model = first.model
+
+    def count(self):
+        return sum(qs.count() for qs in self.querysets.values())
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if isinstance(item, int):
+            return self[item:item + 1][0]
+        start, stop = item.start or 0, item.stop
+        if stop is None:
+            parts = [list(qs) for qs in self.querysets.values()]
+        else:
+            # Each shard contributes at most `stop` rows to the first `stop`.
+            parts = [list(qs[:stop]) for qs in self.querysets.values()]
+        merged = list(heapq.merge(*parts, key=self.key, reverse=self.reverse))
+        return merged[start:stop]
+
+    def __iter__(self):
+        return iter(self[:])
@@ -0,0 +1,31 @@
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+async function logout() {
+    try {
+        await fetch("/auth/logout/", {
+            method: "POST",
+            headers: {
+                "X-CSRFToken": getCookie('csrftoken')
+            },
+            credentials: 'include'
+        });
+    } catch (error) {
+        console.error('Error during logout:', error);
+    } finally {
+        localStorage.removeItem("username");
+        window.location.href = document.body.dataset.logoutRedirect || "/";
+    }
+}
@@ -0,0 +1,49 @@
+document.getElementById("loginForm").addEventListener("submit", async function(e) {
+    e.preventDefault();
+
+    const submitBtn = e.target.querySelector('button[type="submit"]');
+    const originalText = submitBtn.innerHTML;
+
+    submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin mr-2"></i>Signing In...';
+    submitBtn.disabled = true;
+
+    const data = {
+        username: document.getElementById("username").value,
+        password: document.getElementById("password").value
+    };
+
+    try {
+        const response = await fetch("/auth/login/", {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+                "X-CSRFToken": getCookie('csrftoken')
+            },
+            credentials: 'include',
+            body: JSON.stringify(data)
+        });
+
+        const result = await response.json();
+        const messageEl = document.getElementById("message");
+
+        if (response.ok) {
+            messageEl.className = "text-center text-sm text-green-600 font-semibold";
+            messageEl.innerHTML = '<i class="fas fa-check-circle mr-2"></i>Login successful! Redirecting...';
+
+            setTimeout(() => {
+                window.location.href = e.target.dataset.redirect;
+            }, 1000);
+        } else {
+            messageEl.className = "text-center text-sm text-red-600 font-semibold";
+            messageEl.innerHTML = '<i class="fas fa-exclamation-triangle mr-2"></i>' +
+                (result.detail || JSON.stringify(result));
+        }
+    } catch (error) {
+        const messageEl = document.getElementById("message");
+        messageEl.className = "text-center text-sm text-red-600 font-semibold";
+        messageEl.innerHTML = '<i class="fas fa-exclamation-triangle mr-2"></i>Network error. Please try again.';
+    } finally {
+        submitBtn.innerHTML = originalText;
+        submitBtn.disabled = false;
+    }
+});
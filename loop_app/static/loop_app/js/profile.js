@@ -0,0 +1,105 @@
+let isEditMode = false;
+let originalData = {};
+
+function toggleEditMode() {
+    isEditMode = !isEditMode;
+
+    if (isEditMode) {
+
+        originalData = {
+            bio: document.getElementById('bio-input').value,
+            location: document.getElementById('location-input').value,
+            website: document.getElementById('website-input').value
+        };
+
+        document.getElementById('bio-text').classList.add('hidden');
+        document.getElementById('bio-input').classList.remove('hidden');
+        document.getElementById('location-text').classList.add('hidden');
+        document.getElementById('location-input').classList.remove('hidden');
+        document.getElementById('website-text').classList.add('hidden');
+        document.getElementById('website-input').classList.remove('hidden');
+
+        document.getElementById('edit-btn').classList.add('hidden');
+        document.getElementById('save-btn').classList.remove('hidden');
+        document.getElementById('cancel-btn').classList.remove('hidden');
+    } else {
+
+        cancelEdit();
+    }
+}
+
+async function saveProfile() {
+    const updatedData = {
+        bio: document.getElementById('bio-input').value,
+        location: document.getElementById('location-input').value,
+        website: document.getElementById('website-input').value
+    };
+
+    try {
+        const res = await fetch("/profiles/me/", {
+            method: "PUT",
+            headers: {
+                "Content-Type": "application/json",
+                "X-CSRFToken": getCookie('csrftoken')
+            },
+            credentials: 'include',
+            body: JSON.stringify(updatedData)
+        });
+
+        const messageEl = document.getElementById("message");
+
+        if (res.ok) {
+            messageEl.className = "text-center text-sm text-green-600 font-semibold";
+            messageEl.innerHTML = '<i class="fas fa-check-circle mr-2"></i>Profile updated successfully!';
+
+            document.getElementById('bio-text').textContent = updatedData.bio || "No bio yet";
+            document.getElementById('location-text').textContent = updatedData.location || "Not specified";
+
+            if (updatedData.website) {
+                document.getElementById('website-text').innerHTML = `<a href="${updatedData.website}" target="_blank" class="text-blue-600 hover:underline">${updatedData.website}</a>`;
+            } else {
+                document.getElementById('website-text').textContent = "Not specified";
+            }
+
+            exitEditMode();
+
+            setTimeout(() => {
+                messageEl.innerHTML = '';
+            }, 2000);
+
+        } else {
+            const error = await res.json();
+            messageEl.className = "text-center text-sm text-red-600 font-semibold";
+            messageEl.innerHTML = '<i class="fas fa-exclamation-triangle mr-2"></i>' + JSON.stringify(error);
+        }
+    } catch (error) {
+        console.error('Error updating profile:', error);
+        const messageEl = document.getElementById("message");
+        messageEl.className = "text-center text-sm text-red-600 font-semibold";
+        messageEl.innerHTML = '<i class="fas fa-exclamation-triangle mr-2"></i>Failed to update profile';
+    }
+}
+
+function cancelEdit() {
+
+    document.getElementById('bio-input').value = originalData.bio;
+    document.getElementById('location-input').value = originalData.location;
+    document.getElementById('website-input').value = originalData.website;
+
+    exitEditMode();
+}
+
+function exitEditMode() {
+    isEditMode = false;
+
+    document.getElementById('bio-text').classList.remove('hidden');
+    document.getElementById('bio-input').classList.add('hidden');
+    document.getElementById('location-text').classList.remove('hidden');
+    document.getElementById('location-input').classList.add('hidden');
+    document.getElementById('website-text').classList.remove('hidden');
+    document.getElementById('website-input').classList.add('hidden');
+
+    document.getElementById('edit-btn').classList.remove('hidden');
+    document.getElementById('save-btn').classList.add('hidden');
+    document.getElementById('cancel-btn').classList.add('hidden');
+}
@@ -0,0 +1,57 @@
+// The first page is rendered by the server; later pages come from the API.
+const userPosts = document.getElementById("userPosts");
+let nextPage = userPosts.dataset.nextPage ? parseInt(userPosts.dataset.nextPage) : null;
+
+async function loadUserPosts() {
+    if (!nextPage) {
+        return;
+    }
+    try {
+        const res = await fetch(`/posts/?user=${encodeURIComponent(userPosts.dataset.username)}&page=${nextPage}`, {
+            credentials: 'include'
+        });
+
+        if (res.ok) {
+            const data = await res.json();
+            nextPage = data.next ? nextPage + 1 : null;
+            document.getElementById("loadMore").classList.toggle('hidden', !nextPage);
+
+            data.results.forEach(post => {
+                const postDate = new Date(post.created_at).toLocaleDateString();
+                const postElement = `
+                    <div class="bg-white rounded-lg border p-4 hover:shadow-md transition-shadow">
+                        <div class="flex items-center justify-between mb-3">
+                            <div class="flex items-center space-x-3">
+                                <div class="w-8 h-8 bg-gradient-to-r from-blue-500 to-purple-600 rounded-full flex items-center justify-center text-white text-sm font-semibold">
+                                    ${post.user.username.charAt(0).toUpperCase()}
+                                </div>
+                                <span class="font-semibold text-gray-800">${post.user.username}</span>
+                            </div>
+                            <span class="text-sm text-gray-500">${postDate}</span>
+                        </div>
+
+                        <p class="text-gray-700 mb-3">${post.content}</p>
+
+                        ${post.image ? `
+                            <img src="${post.image}" alt="Post image" class="rounded-lg mb-3 w-full max-h-64 object-cover">
+                        ` : ''}
+
+                        <div class="flex items-center space-x-4 text-gray-500 text-sm">
+                            <div class="flex items-center space-x-1">
+                                <i class="far fa-heart"></i>
+                                <span>${post.likes_count}</span>
+                            </div>
+                            <div class="flex items-center space-x-1">
+                                <i class="far fa-comment"></i>
+                                <span>${post.comments_count}</span>
+                            </div>
+                        </div>
+                    </div>
+                `;
+                userPosts.insertAdjacentHTML('beforeend', postElement);
+            });
+        }
+    } catch (error) {
+        console.error('Error loading user posts:', error);
+    }
+}
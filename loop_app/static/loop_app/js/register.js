@@ -0,0 +1,28 @@
+document.getElementById("registerForm").addEventListener("submit", async function(e) {
+    e.preventDefault();
+    const data = {
+        username: document.getElementById("username").value,
+        email: document.getElementById("email").value,
+        password: document.getElementById("password").value,
+    };
+
+    const response = await fetch("/auth/register/", {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+            "X-CSRFToken": getCookie('csrftoken')
+        },
+        body: JSON.stringify(data)
+    });
+    const result = await response.json();
+
+    const messageEl = document.getElementById("message");
+    if (response.ok) {
+        messageEl.className = "mt-4 text-center text-sm text-green-600";
+        messageEl.innerText = "Registration successful! Redirecting to login...";
+        setTimeout(() => window.location.href = e.target.dataset.redirect, 2000);
+    } else {
+        messageEl.className = "mt-4 text-center text-sm text-red-600";
+        messageEl.innerText = "Error: " + JSON.stringify(result);
+    }
+});
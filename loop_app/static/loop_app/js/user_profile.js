@@ -0,0 +1,51 @@
+async function followUser(userId) {
+    try {
+        const res = await fetch(`/users/${userId}/follow/`, {
+            method: "POST",
+            headers: {
+                "X-CSRFToken": getCookie('csrftoken')
+            },
+            credentials: 'include'
+        });
+
+        if (res.ok) {
+            document.getElementById('followBtn').classList.add('hidden');
+            document.getElementById('unfollowBtn').classList.remove('hidden');
+
+            const followersCount = document.getElementById('followersCount');
+            followersCount.textContent = parseInt(followersCount.textContent) + 1;
+
+        } else {
+            alert("Failed to follow user");
+        }
+    } catch (error) {
+        console.error('Error following user:', error);
+        alert("Failed to follow user");
+    }
+}
+
+async function unfollowUser(userId) {
+    try {
+        const res = await fetch(`/users/${userId}/follow/`, {
+            method: "DELETE",
+            headers: {
+                "X-CSRFToken": getCookie('csrftoken')
+            },
+            credentials: 'include'
+        });
+
+        if (res.ok) {
+            document.getElementById('unfollowBtn').classList.add('hidden');
+            document.getElementById('followBtn').classList.remove('hidden');
+
+            const followersCount = document.getElementById('followersCount');
+            followersCount.textContent = parseInt(followersCount.textContent) - 1;
+
+        } else {
+            alert("Failed to unfollow user");
+        }
+    } catch (error) {
+        console.error('Error unfollowing user:', error);
+        alert("Failed to unfollow user");
+    }
+}
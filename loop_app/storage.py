@@ -0,0 +1,16 @@
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+
+class ManifestStaticStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that links the plain, unhashed file when a
+    name is missing from the manifest (or there is no manifest yet, before
+    `manage.py build_assets` has run) instead of failing the whole page.
+    collectstatic itself is unchanged and still reports broken references.
+    """
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
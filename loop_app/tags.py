@@ -0,0 +1,22 @@
+import re
+
+HASHTAG = 'hashtag'
+MENTION = 'mention'
+
+HASHTAG_RE = re.compile(r'(?<![\w&])#(\w{1,100})')
+# Same characters Django allows in usernames.
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.@+-]{1,150})')
+
+
+def extract_tags(content):
+    """Returns the set of (kind, tag) pairs found in a post's text."""
+    tags = {(HASHTAG, tag.lower()) for tag in HASHTAG_RE.findall(content or '')}
+    tags |= {(MENTION, name.rstrip('.').lower()) for name in MENTION_RE.findall(content or '')}
+    return tags
+
+
+def parse_tag(tag):
+    """Turns a tag from a URL ('python', '#python', '@alice') into (kind, tag)."""
+    if tag.startswith('@'):
+        return MENTION, tag[1:].lower()
+    return HASHTAG, tag.lstrip('#').lower()
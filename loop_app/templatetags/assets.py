@@ -0,0 +1,42 @@
+import functools
+import logging
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+logger = logging.getLogger(__name__)
+register = template.Library()
+
+TAILWIND_CDN = 'https://cdn.tailwindcss.com'
+
+
+@functools.cache
+def check_collected():
+    """Warns, once per process, when a deploy skipped `manage.py build_assets`."""
+    collected = staticfiles_storage.exists(settings.TAILWIND_OUTPUT)
+    if not collected:
+        logger.warning(
+            '%s is not in STATIC_ROOT, so pages are served unstyled; run '
+            '`manage.py build_assets` as part of the deploy.', settings.TAILWIND_OUTPUT,
+        )
+    return collected
+
+
+@register.simple_tag
+def tailwind_stylesheet():
+    """
+    Links the stylesheet produced by `manage.py build_assets`. In development,
+    until it has been built, falls back to the Tailwind CDN so pages still
+    render styled.
+    """
+    if settings.DEBUG:
+        # Checked on every render, so a fresh build shows up without a restart.
+        if not finders.find(settings.TAILWIND_OUTPUT):
+            return format_html('<script src="{}"></script>', TAILWIND_CDN)
+    else:
+        check_collected()
+    return format_html('<link rel="stylesheet" href="{}">', static(settings.TAILWIND_OUTPUT))
@@ -1,3 +1,409 @@
-from django.test import TestCase
+import copy
+import json
+import os
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import resolve
+
+from .models import User, UserProfile, Post, Comment, Like, Follow, PostTag
+from .management.commands.replay_traces import Command as ReplayCommand, Personas, ReplayUser
+from .middleware import PrimaryPinningMiddleware
+from .routers import ReadReplicaRouter, is_pinned_to_primary, pin_to_primary, unpin
+from .sharding import shard_for_user
+from .templatetags.assets import TAILWIND_CDN, check_collected
+from .tags import HASHTAG, MENTION, extract_tags, parse_tag
+from .traces import anonymize, pseudonym
+from .views import first_page_of_posts
+
+# The shipped settings run a single shard, so give the tests a second one
+# to spread rows over. It has to exist before the test databases are set up.
+if 'shard1' not in connections.settings:
+    connections.settings['shard1'] = {
+        **copy.deepcopy(connections.settings['default']),
+        'NAME': settings.BASE_DIR / 'shard1.sqlite3',
+    }
+
+SHARDS = ['default', 'shard1']
+
+
+@override_settings(DATABASE_SHARDS=SHARDS)
+class ShardingTests(TestCase):
+    databases = set(SHARDS)
+
+    def setUp(self):
+        users = [User.objects.create_user(f'user{i}', password='pw') for i in range(2)]
+        # Consecutive ids, so one user lives on each shard.
+        self.home = {shard_for_user(user.id): user for user in users}
+        self.on_default = self.home['default']
+        self.on_shard1 = self.home['shard1']
+
+    def post_as(self, user, path, data=None):
+        # A session login, so request.user is the lazy object real requests see.
+        self.client.force_login(user)
+        return self.client.post(path, data or {}, content_type='application/json')
+
+    def test_post_is_created_on_authors_shard(self):
+        response = self.post_as(self.on_shard1, '/posts/', {'content': 'hello #loop'})
+        self.assertEqual(response.status_code, 201)
+        post_id = response.json()['id']
+        self.assertTrue(Post.objects.using('shard1').filter(id=post_id).exists())
+        self.assertFalse(Post.objects.using('default').filter(id=post_id).exists())
+        self.assertEqual(Post.objects.using('shard1').get(id=post_id).tags.count(), 1)
+
+    def test_like_and_comment_live_next_to_the_post(self):
+        post = Post.objects.create(user=self.on_shard1, content='hi')
+
+        response = self.post_as(self.on_default, f'/posts/{post.id}/like/')
+        self.assertEqual(response.status_code, 201)
+        response = self.post_as(self.on_default, f'/posts/{post.id}/comments/', {'content': 'nice'})
+        self.assertEqual(response.status_code, 201)
+        comment_id = response.json()['id']
+        response = self.post_as(self.on_default, f'/comments/{comment_id}/like/')
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(Like.objects.using('shard1').filter(post=post).count(), 1)
+        self.assertEqual(Like.objects.using('shard1').filter(comment_id=comment_id).count(), 1)
+        self.assertTrue(Comment.objects.using('shard1').filter(id=comment_id).exists())
+        self.assertEqual(Like.objects.using('default').count(), 0)
+
+    def test_like_saved_directly_goes_to_posts_shard(self):
+        # The liker is declared first on Like, so their shard must not win.
+        post = Post.objects.create(user=self.on_shard1, content='hi')
+        like = Like(user=self.on_default, post=post)
+        like.save()
+        self.assertEqual(like._state.db, 'shard1')
+
+    def test_feed_merges_shards_newest_first(self):
+        reader = User.objects.create_user('reader', password='pw')
+        for author in (self.on_default, self.on_shard1):
+            Follow.objects.create(follower=reader, following=author)
+        for i in range(3):
+            for author in (self.on_default, self.on_shard1):
+                Post.objects.create(user=author, content=f'{author.username} {i}')
+
+        self.client.force_login(reader)
+        data = self.client.get('/api/feed/').json()
+        self.assertEqual(data['count'], 6)
+        created = [post['created_at'] for post in data['results']]
+        self.assertEqual(created, sorted(created, reverse=True))
+        authors = {post['user']['id'] for post in data['results']}
+        self.assertEqual(authors, {self.on_default.id, self.on_shard1.id})
+
+    def test_first_page_counts_likes_and_comments_per_post(self):
+        posts = [
+            Post.objects.create(user=author, content=f'{author.username} {i}')
+            for i in range(6) for author in (self.on_default, self.on_shard1)
+        ]
+        Like.objects.create(post=posts[-1], user=self.on_default)
+        Like.objects.create(post=posts[-1], user=self.on_shard1)
+        Comment.objects.create(post=posts[-1], user=self.on_default, content='c')
+
+        page, has_next = first_page_of_posts()
+        self.assertTrue(has_next)
+        self.assertEqual(len(page), 10)
+        self.assertEqual(page[0].id, posts[-1].id)
+        self.assertEqual((page[0].likes_count, page[0].comments_count), (2, 1))
+        self.assertEqual({(post.likes_count, post.comments_count) for post in page[1:]}, {(0, 0)})
+
+    def test_reaper_removes_deleted_post_and_dependents_on_its_shard(self):
+        post = Post.objects.create(user=self.on_shard1, content='bye')
+        comment = Comment.objects.create(post=post, user=self.on_default, content='c')
+        Like.objects.create(post=post, user=self.on_default)
+        Like.objects.create(comment=comment, user=self.on_shard1)
+        post.soft_delete()
+
+        call_command('reap_deleted', stdout=StringIO())
+
+        self.assertFalse(Post.all_objects.using('shard1').filter(id=post.id).exists())
+        self.assertEqual(Comment.objects.using('shard1').count(), 0)
+        self.assertEqual(Like.objects.using('shard1').count(), 0)
+
+
+
+class SoftDeleteTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', password='pw')
+        self.bob = User.objects.create_user('bob', password='pw')
+        self.post = Post.objects.create(user=self.alice, content='hi')
+
+    def test_deleted_post_disappears_at_once(self):
+        self.client.force_login(self.alice)
+        response = self.client.delete(f'/posts/{self.post.id}/')
+        self.assertEqual(response.status_code, 204)
+
+        self.assertEqual(self.client.get(f'/posts/{self.post.id}/').status_code, 404)
+        self.assertEqual(self.client.get('/posts/').json()['count'], 0)
+        self.assertEqual(self.client.get(f'/posts/{self.post.id}/comments/').json(), [])
+
+    def test_deleted_account_disappears_at_once(self):
+        Post.objects.create(user=self.bob, content='bye')
+        Comment.objects.create(post=self.post, user=self.bob, content='nice')
+        Like.objects.create(post=self.post, user=self.bob)
+        Follow.objects.create(follower=self.bob, following=self.alice)
+        Follow.objects.create(follower=self.alice, following=self.bob)
+
+        self.client.force_login(self.bob)
+        self.assertEqual(self.client.delete('/profiles/me/').status_code, 204)
+
+        self.client.force_login(self.alice)
+        posts = self.client.get('/posts/').json()['results']
+        self.assertEqual([post['id'] for post in posts], [self.post.id])
+        self.assertEqual(posts[0]['comments'], [])
+        self.assertEqual((posts[0]['likes_count'], posts[0]['comments_count']), (0, 0))
+        self.assertEqual(self.client.get(f'/posts/{self.post.id}/comments/').json(), [])
+        profile = self.client.get(f'/profiles/{self.alice.user_profile.pk}/').json()
+        self.assertEqual((profile['followers_count'], profile['following_count']), (0, 0))
+        self.assertEqual(self.client.get(f'/profiles/{self.bob.user_profile.pk}/').status_code, 404)
+        page, _ = first_page_of_posts(self.alice)
+        self.assertEqual((page[0].likes_count, page[0].comments_count), (0, 0))
+
+class PageTests(TestCase):
+    # The test runner renders with DEBUG off and, like a fresh deploy,
+    # without a collected static manifest.
+    def test_pages_render_before_assets_are_built(self):
+        check_collected.cache_clear()
+        user = User.objects.create_user('reader', password='pw')
+        with self.assertLogs('loop_app.templatetags.assets', 'WARNING') as logs:
+            for path in ('/', '/login/', '/register/'):
+                self.assertEqual(self.client.get(path).status_code, 200, path)
+            self.client.force_login(user)
+            for path in ('/feed/', '/profile/', f'/profile/{user.username}/'):
+                self.assertEqual(self.client.get(path).status_code, 200, path)
+        self.assertEqual(len(logs.output), 1)
+        self.assertNotContains(self.client.get('/'), TAILWIND_CDN)
+
+    @override_settings(DEBUG=True)
+    @mock.patch('django.contrib.staticfiles.finders.find', return_value=None)
+    def test_development_falls_back_to_the_cdn(self, find):
+        self.assertContains(self.client.get('/'), TAILWIND_CDN)
+
+
+class LoadSheddingTests(TestCase):
+    def test_requests_queued_too_long_are_shed(self):
+        # 400 ms in the proxy's queue: over half of MAX_QUEUE_MS, under all of it.
+        queued = {'HTTP_X_REQUEST_START': f't={time.time() - 0.4:.3f}'}
+        response = self.client.get('/posts/', **queued)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertEqual(self.client.get('/login/', **queued).status_code, 200)
+        self.assertEqual(self.client.get('/posts/').status_code, 200)
+
+
+class ExportTests(TestCase):
+    def test_export_endpoint_leaves_out_credentials(self):
+        admin = User.objects.create_superuser('admin', password='pw')
+        self.client.force_login(admin)
+        response = self.client.get('/export/?user=admin')
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        account = next(row for row in rows if row['model'] == 'loop_app.user')
+        self.assertEqual(account['fields']['username'], 'admin')
+        self.assertNotIn('password', account['fields'])
+        self.assertNotIn('last_login', account['fields'])
+
+
+    def export(self, **options):
+        out = StringIO()
+        call_command('export_data', stdout=out, stderr=StringIO(), **options)
+        return out.getvalue()
+
+    def import_(self, data, **options):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as f:
+            f.write(data)
+        self.addCleanup(os.remove, f.name)
+        out = StringIO()
+        call_command('import_data', f.name, '--no-index', stdout=out, **options)
+        return out.getvalue()
+
+    def test_one_users_export_loads_into_an_empty_database(self):
+        alice = User.objects.create_user('alice', password='pw')
+        bob = User.objects.create_user('bob', password='pw')
+        Follow.objects.create(follower=alice, following=bob)
+        own = Post.objects.create(user=alice, content='mine')
+        theirs = Post.objects.create(user=bob, content='theirs')
+        Comment.objects.create(post=own, user=alice, content='on mine')
+        Comment.objects.create(post=theirs, user=alice, content='on theirs')
+        Like.objects.create(post=own, user=alice)
+        Like.objects.create(post=theirs, user=alice)
+
+        data = self.export(user='alice', credentials=True)
+        User.objects.all().delete()
+
+        output = self.import_(data)
+        self.assertIn('Skipped 1 loop_app.follow rows', output)
+        alice = User.objects.get(username='alice')
+        self.assertTrue(alice.check_password('pw'))
+        self.assertFalse(User.objects.filter(username='bob').exists())
+        self.assertEqual(list(Post.objects.values_list('content', flat=True)), ['mine'])
+        self.assertEqual(list(Comment.objects.values_list('content', flat=True)), ['on mine'])
+        self.assertEqual(Like.objects.get().post_id, own.id)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_failed_import_leaves_nothing_behind(self):
+        alice = User.objects.create_user('alice', password='pw')
+        post = Post.objects.create(user=alice, content='mine')
+        data = self.export()
+        carol = User.objects.create_user('carol', password='pw')
+        alice.delete()
+        # Clashes with the exported post, after alice's user and profile
+        # rows have been written.
+        Post.objects.create(pk=post.pk, user=carol, content='hers')
+
+        with self.assertRaises(CommandError):
+            self.import_(data)
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['carol'])
+        self.assertEqual(UserProfile.objects.count(), 1)
+        self.assertEqual(Post.objects.get().content, 'hers')
+
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def login(self, forwarded_for):
+        return self.client.post(
+            '/auth/login/', {'username': 'nobody', 'password': 'wrong'},
+            content_type='application/json', HTTP_X_FORWARDED_FOR=forwarded_for,
+        )
+
+    def test_spoofed_forwarded_for_does_not_dodge_the_throttle(self):
+        # The proxy appends the real address after whatever the client sent.
+        statuses = [self.login(f'198.51.100.{i}, 203.0.113.7').status_code for i in range(12)]
+        self.assertEqual(statuses, [400] * 10 + [429] * 2)
+        self.assertEqual(self.login('203.0.113.8').status_code, 400)
+
+
+
+class TraceTests(TestCase):
+    def test_profile_ids_are_pseudonymized_and_replayed_as_a_local_user(self):
+        traced = User.objects.create_user('alice', password='pw')
+        request = RequestFactory().get(f'/profiles/{traced.user_profile.pk}/')
+        request.resolver_match = resolve(request.path)
+        request.user = AnonymousUser()
+
+        trace = anonymize(request, HttpResponse(), time.time(), 1.0)
+        self.assertEqual(trace['kwargs'], {'pk': {'profile': pseudonym(traced.pk)}})
+
+        local = User.objects.create_user('bob', password='pw')
+        replay = ReplayCommand()
+        replay.base_url = ''
+        url, _, _ = replay.build(trace, Personas([ReplayUser(local, 'session')]))
+        self.assertEqual(url, f'/profiles/{local.user_profile.pk}/')
+
+
+class ReadReplicaRouterTests(TransactionTestCase):
+    router = ReadReplicaRouter()
+
+    def test_feed_reads_go_to_the_replica_unless_pinned(self):
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        token = pin_to_primary()
+        try:
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        finally:
+            unpin(token)
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_reads_inside_a_transaction_stay_on_the_primary(self):
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+
+class PrimaryPinningTests(SimpleTestCase):
+    def respond(self, request, status=200):
+        pinned = []
+
+        def get_response(request):
+            pinned.append(is_pinned_to_primary())
+            return HttpResponse(status=status)
+
+        response = PrimaryPinningMiddleware(get_response)(request)
+        self.assertFalse(is_pinned_to_primary())
+        return response, pinned[0]
+
+    def test_a_write_is_pinned_and_pins_the_next_reads(self):
+        factory = RequestFactory()
+        response, pinned = self.respond(factory.post('/posts/'))
+        self.assertTrue(pinned)
+        cookie = response.cookies['pin_primary']
+        self.assertEqual(cookie['max-age'], 5)
+        self.assertTrue(cookie['httponly'])
+
+        factory.cookies['pin_primary'] = cookie.value
+        response, pinned = self.respond(factory.get('/posts/'))
+        self.assertTrue(pinned)
+        self.assertNotIn('pin_primary', response.cookies)
+
+    def test_reads_without_the_cookie_are_not_pinned(self):
+        response, pinned = self.respond(RequestFactory().get('/posts/'))
+        self.assertFalse(pinned)
+        self.assertNotIn('pin_primary', response.cookies)
+
+    def test_a_failed_write_does_not_pin_later_reads(self):
+        response, pinned = self.respond(RequestFactory().post('/posts/'), status=400)
+        self.assertTrue(pinned)
+        self.assertNotIn('pin_primary', response.cookies)
+
+
+class ExtractTagsTests(SimpleTestCase):
+    def test_html_entities_are_not_hashtags(self):
+        self.assertEqual(extract_tags("it&#39;s #fine"), {(HASHTAG, 'fine')})
+
+    def test_email_addresses_are_not_mentions(self):
+        self.assertEqual(extract_tags('write to bob@example.com'), set())
+
+    def test_trailing_dots_are_not_part_of_a_mention(self):
+        self.assertEqual(extract_tags('thanks @alice.'), {(MENTION, 'alice')})
+        self.assertEqual(extract_tags('cc @a.b...'), {(MENTION, 'a.b')})
+
+    def test_tags_are_case_folded(self):
+        self.assertEqual(
+            extract_tags('#Python and #PYTHON with @Alice'),
+            {(HASHTAG, 'python'), (MENTION, 'alice')},
+        )
+        self.assertEqual(parse_tag('#Python'), (HASHTAG, 'python'))
+        self.assertEqual(parse_tag('@Alice'), (MENTION, 'alice'))
+
+
+class TagPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw')
+        self.client.force_login(self.user)
+
+    def test_editing_a_post_reindexes_its_tags(self):
+        post_id = self.client.post(
+            '/posts/', {'content': '#old'}, content_type='application/json',
+        ).json()['id']
+        self.client.put(
+            f'/posts/{post_id}/', {'content': '#new'}, content_type='application/json',
+        )
+        self.assertEqual(self.client.get('/posts/tags/old/').json()['count'], 0)
+        self.assertEqual(
+            [post['id'] for post in self.client.get('/posts/tags/new/').json()['results']],
+            [post_id],
+        )
+
+    def test_mention_pages_are_newest_first(self):
+        posts = []
+        for i in range(12):
+            post = Post.objects.create(user=self.user, content=f'{i} hi @Bob')
+            PostTag.index_post(post)
+            posts.append(post.id)
+        PostTag.index_post(Post.objects.create(user=self.user, content='hi @bobby'))
+
+        first = self.client.get('/posts/tags/@BOB/').json()
+        self.assertEqual(first['count'], 12)
+        self.assertEqual([post['id'] for post in first['results']], posts[:-11:-1])
+        second = self.client.get(first['next']).json()
+        self.assertEqual([post['id'] for post in second['results']], posts[1::-1])
+        self.assertIsNone(second['next'])
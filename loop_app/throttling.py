@@ -0,0 +1,77 @@
+from rest_framework.throttling import SimpleRateThrottle
+
+from . import metrics
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket on top of DRF's rate settings: a rate of '10/min' allows a
+    burst of 10 requests and then refills one token every 6 seconds.
+
+    State lives in the cache, so every worker pointed at the same cache
+    shares the same buckets.
+
+    The limit is approximate. The bucket is read and written back with
+    cache.get()/cache.set(), which is not atomic: requests for the same key
+    that overlap in different workers can each spend the same token, so a
+    burst can exceed the capacity by up to the number of overlapping
+    requests. Django's cache API only offers add()/incr(), which cannot cap
+    an idle bucket at its capacity, so an exact bucket would need a
+    backend-specific script (e.g. Lua on Redis). Without shared caches
+    (the locmem default) each worker process has its own buckets anyway.
+    """
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        capacity = self.num_requests
+        refill_per_second = self.num_requests / self.duration
+
+        tokens, updated_at = self.cache.get(self.key, (capacity, self.now))
+        tokens = min(capacity, tokens + (self.now - updated_at) * refill_per_second)
+        self.tokens = tokens
+        self.refill_per_second = refill_per_second
+
+        if tokens < 1:
+            metrics.incr(f'throttled:{self.scope}')
+            return False
+
+        # Not atomic with the get() above; see the class docstring.
+        self.cache.set(self.key, (tokens - 1, self.now), self.duration)
+        return True
+
+    def wait(self):
+        return max(0, (1 - self.tokens) / self.refill_per_second)
+
+
+class LoginRateThrottle(TokenBucketThrottle):
+    # Logins are anonymous, so this always keys on the client IP, as seen
+    # by the proxy (REST_FRAMEWORK['NUM_PROXIES']), not as the client claims.
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': f'ip:{self.get_ident(request)}',
+        }
+
+
+class SearchRateThrottle(TokenBucketThrottle):
+    scope = 'search'
+
+
+class LikeRateThrottle(TokenBucketThrottle):
+    scope = 'like'
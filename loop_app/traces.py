@@ -0,0 +1,134 @@
+"""
+Request traces for capacity testing.
+
+RequestTraceMiddleware writes one JSON line per sampled API request:
+
+    {"ts": 1760891000.12, "method": "GET", "route": "news-feed",
+     "kwargs": {}, "params": {"page": "2"}, "user": "3f9a0c...",
+     "status": 200, "ms": 41.2}
+
+Nothing in a trace identifies a person. User ids and usernames become
+keyed pseudonyms: the same user always gets the same one, so a replay
+keeps each user's sequence of requests. A profile id names its user, so
+it becomes that user's pseudonym too. Free text such as search queries
+is reduced to its length. Post and comment ids are kept so that a replay
+against a copy of the data hits the same rows. `manage.py replay_traces`
+plays the files back.
+"""
+import heapq
+import json
+import logging
+import os
+import threading
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.utils.crypto import salted_hmac
+
+from .models import UserProfile
+
+TRACED_ROUTES = {
+    'news-feed', 'post-list', 'post-detail', 'post-tag-list', 'comment-list',
+    'user-search', 'like-post', 'like-comment', 'follow-user',
+    'my-profile', 'profile-detail', 'feed', 'profile', 'user-profile',
+}
+
+# Path kwargs and query params that name a user.
+USER_KWARGS = {'user_id', 'username'}
+# Routes whose `pk` is a UserProfile id.
+PROFILE_ROUTES = {'profile-detail'}
+USER_PARAMS = {'user'}
+# Query params kept verbatim; any other value is replaced by its length.
+KEPT_PARAMS = {'page'}
+
+
+def pseudonym(value):
+    return salted_hmac('loop_app.traces', str(value)).hexdigest()[:16]
+
+
+def anonymize(request, response, started, elapsed_ms):
+    """Returns the trace line for a request that resolved to a traced route."""
+    kwargs = {}
+    route = request.resolver_match.url_name
+    for name, value in request.resolver_match.kwargs.items():
+        if name in USER_KWARGS:
+            value = {'user': pseudonym(value)}
+        elif name == 'pk' and route in PROFILE_ROUTES:
+            user_id = UserProfile.objects.filter(pk=value).values_list('user_id', flat=True).first()
+            # A profile that does not exist names nobody; it replays as a 404.
+            value = {'profile': pseudonym(user_id)} if user_id is not None else 0
+        elif name == 'tag' and value.startswith('@'):
+            value = {'mention': pseudonym(value[1:].lower())}
+        kwargs[name] = value
+
+    params = {}
+    for name, value in request.GET.items():
+        if name in KEPT_PARAMS:
+            params[name] = value
+        elif name in USER_PARAMS:
+            params[name] = {'user': pseudonym(value)}
+        else:
+            params[name] = {'len': len(value)}
+
+    user = getattr(request, 'user', None)
+    trace = {
+        'ts': round(started, 3),
+        'method': request.method,
+        'route': route,
+        'kwargs': kwargs,
+        'params': params,
+        'user': pseudonym(user.pk) if user is not None and user.is_authenticated else None,
+        'status': response.status_code,
+        'ms': round(elapsed_ms, 2),
+    }
+    if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        trace['body_bytes'] = int(request.META.get('CONTENT_LENGTH') or 0)
+    return trace
+
+
+class TraceLog:
+    """
+    Appends traces to <dir>/requests-<pid>.jsonl, rotated by size. Each
+    worker process gets its own file, since rotation is not safe across
+    processes; the file is opened on first write, after any fork.
+    """
+
+    def __init__(self, directory, max_bytes, backup_count):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.lock = threading.Lock()
+        self.pid = None
+        self.handler = None
+
+    def write(self, trace):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self.handler = RotatingFileHandler(
+                    self.directory / f'requests-{os.getpid()}.jsonl',
+                    maxBytes=self.max_bytes, backupCount=self.backup_count,
+                    encoding='utf-8', delay=True,
+                )
+                self.pid = os.getpid()
+        self.handler.handle(logging.makeLogRecord({'msg': json.dumps(trace)}))
+
+
+def read_traces(paths):
+    """Yields the traces in `paths` (files or directories) in time order."""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.glob('requests-*.jsonl*')))
+        else:
+            files.append(path)
+
+    def lines(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    # Lines are written as requests finish, so each file is only roughly in
+    # start order; a merge is close enough for scheduling a replay.
+    yield from heapq.merge(*(lines(path) for path in files), key=lambda trace: trace['ts'])
@@ -22,6 +22,7 @@ urlpatterns = [
    
     path('posts/', views.PostListCreateView.as_view(), name='post-list'),
     path('posts/<int:pk>/', views.PostDetailView.as_view(), name='post-detail'),
+    path('posts/tags/<str:tag>/', views.PostTagListView.as_view(), name='post-tag-list'),
     path('posts/<int:post_id>/comments/', views.CommentListCreateView.as_view(), name='comment-list'),
     
     
@@ -34,4 +35,6 @@ urlpatterns = [
     
     path('search/users/', views.UserSearchView.as_view(), name='user-search'),
     path('api/feed/', views.NewsFeedView.as_view(), name='news-feed'),
+    path('metrics/load/', views.LoadMetricsView.as_view(), name='load-metrics'),
+    path('export/', views.DataExportView.as_view(), name='data-export'),
 ]
\ No newline at end of file
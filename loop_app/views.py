@@ -1,14 +1,27 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Q, F, Exists, OuterRef, Value
 from django.contrib.auth import login 
 from django.contrib.auth import logout as auth_logout
-from .models import User, UserProfile, Post, Comment, Like, Follow
+from .models import User, UserProfile, Post, Comment, Like, Follow, PostTag
+from .tags import parse_tag
+from .sharding import (
+    MergedQuerySet, across_shards, for_author, is_sharded, shard_for_id, shard_for_user,
+    shards_for_user, with_authors,
+)
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer,
     PostSerializer, CommentSerializer, LikeSerializer, FollowSerializer, UserSearchSerializer
 )
+from .pagination import PostPagination
+from .transfer import export_lines
+from .throttling import LoginRateThrottle, SearchRateThrottle, LikeRateThrottle
+from . import metrics
+from .middleware import current_load
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -18,6 +31,7 @@ class UserRegistrationView(generics.CreateAPIView):
 
 class UserLoginView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginRateThrottle]
     
     def get(self, request):
         
@@ -47,13 +61,12 @@ class UserLogoutView(APIView):
         return Response({'message': 'Logout successful'})
 
 
-class UserProfileView(generics.RetrieveUpdateAPIView):
+class UserProfileView(generics.RetrieveUpdateDestroyAPIView):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
     
     def get_object(self):
-        profile, created = UserProfile.objects.get_or_create(user=self.request.user)
-        return profile
+        return get_object_or_404(UserProfile.objects.with_counts(), user=self.request.user)
     
     def update(self, request, *args, **kwargs):
         user = request.user
@@ -69,8 +82,14 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
             'website': user.website
         })
 
+    def destroy(self, request, *args, **kwargs):
+        # The account disappears now; reap_deleted removes its rows later.
+        request.user.soft_delete()
+        auth_logout(request)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 class UserProfileDetailView(generics.RetrieveAPIView):
-    queryset = UserProfile.objects.all()
+    queryset = UserProfile.objects.with_counts().filter(user__deleted_at__isnull=True)
     serializer_class = UserProfileSerializer
 
 
@@ -78,57 +97,105 @@ class PostListCreateView(generics.ListCreateAPIView):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = PostPagination
     
     def get_queryset(self):
-        return Post.objects.all().order_by('-created_at')
+        queryset = with_authors(Post.objects.all()).prefetch_related('comments__user')
+        queryset = queryset.order_by('-created_at')
+        username = self.request.GET.get('user')
+        if username:
+            # Only the shards that hold this author's posts are queried.
+            user_id = User.objects.filter(username=username).values_list('id', flat=True).first()
+            if user_id is None:
+                return queryset.none()
+            return for_author(queryset, user_id)
+        return across_shards(queryset)
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic(using=shard_for_user(self.request.user.id)):
+            post = serializer.save(user=self.request.user)
+            PostTag.index_post(post)
 
 class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def get_queryset(self):
+        return Post.objects.using(shard_for_id(self.kwargs['pk']))
+
+    def perform_update(self, serializer):
+        with transaction.atomic(using=shard_for_id(self.kwargs['pk'])):
+            post = serializer.save()
+            PostTag.index_post(post)
+
+    def perform_destroy(self, instance):
+        # Cascading through comments and likes here would hold the write lock
+        # for the whole request, so the post is only hidden; reap_deleted
+        # removes it and its dependents in the background.
+        instance.soft_delete()
+
+class PostTagListView(generics.ListAPIView):
+    """Posts using a hashtag (/posts/tags/python/) or mention (/posts/tags/@alice/)."""
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = PostPagination
+
+    def get_queryset(self):
+        kind, tag = parse_tag(self.kwargs['tag'])
+        queryset = (
+            with_authors(Post.objects.filter(tags__kind=kind, tags__tag=tag))
+            .prefetch_related('comments__user')
+            .annotate(tagged_at=F('tags__created_at'))
+            .order_by('-tagged_at')
+        )
+        return across_shards(queryset)
+
 class CommentListCreateView(generics.ListCreateAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     
     def get_queryset(self):
         post_id = self.kwargs['post_id']
-        return Comment.objects.filter(post_id=post_id)
+        return Comment.objects.using(shard_for_id(post_id)).filter(
+            post_id=post_id, post__deleted_at__isnull=True,
+        ).exclude(user_id__in=User.pending_deletion_ids())
     
     def perform_create(self, serializer):
         post_id = self.kwargs['post_id']
-        serializer.save(user=self.request.user, post_id=post_id)
+        post = get_object_or_404(Post.objects.using(shard_for_id(post_id)), id=post_id)
+        serializer.save(user=self.request.user, post=post)
 
 
 class LikePostView(APIView):
+    throttle_classes = [LikeRateThrottle]
+
     def post(self, request, post_id):
-        post = generics.get_object_or_404(Post, id=post_id)
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
+        post = generics.get_object_or_404(Post.objects.using(shard_for_id(post_id)), id=post_id)
+        like, created = Like.objects.using(shard_for_id(post_id)).get_or_create(user=request.user, post=post)
         
         if created:
             return Response({'message': 'Post liked'}, status=status.HTTP_201_CREATED)
         return Response({'message': 'Post already liked'}, status=status.HTTP_200_OK)
     
     def delete(self, request, post_id):
-        post = generics.get_object_or_404(Post, id=post_id)
-        Like.objects.filter(user=request.user, post=post).delete()
+        post = generics.get_object_or_404(Post.objects.using(shard_for_id(post_id)), id=post_id)
+        Like.objects.using(shard_for_id(post_id)).filter(user=request.user, post=post).delete()
         return Response({'message': 'Post unliked'})
 
 class LikeCommentView(APIView):
+    throttle_classes = [LikeRateThrottle]
+
     def post(self, request, comment_id):
-        comment = generics.get_object_or_404(Comment, id=comment_id)
-        like, created = Like.objects.get_or_create(user=request.user, comment=comment)
+        comment = generics.get_object_or_404(Comment.objects.using(shard_for_id(comment_id)), id=comment_id)
+        like, created = Like.objects.using(shard_for_id(comment_id)).get_or_create(user=request.user, comment=comment)
         
         if created:
             return Response({'message': 'Comment liked'}, status=status.HTTP_201_CREATED)
         return Response({'message': 'Comment already liked'}, status=status.HTTP_200_OK)
     
     def delete(self, request, comment_id):
-        comment = generics.get_object_or_404(Comment, id=comment_id)
-        Like.objects.filter(user=request.user, comment=comment).delete()
+        comment = generics.get_object_or_404(Comment.objects.using(shard_for_id(comment_id)), id=comment_id)
+        Like.objects.using(shard_for_id(comment_id)).filter(user=request.user, comment=comment).delete()
         return Response({'message': 'Comment unliked'})
 
 
@@ -178,6 +245,7 @@ class FollowUserView(APIView):
 
 class UserSearchView(generics.ListAPIView):
     serializer_class = UserSearchSerializer
+    throttle_classes = [SearchRateThrottle]
     
     def get_serializer_context(self):
         return {'request': self.request}
@@ -188,28 +256,70 @@ class UserSearchView(generics.ListAPIView):
         if not query:
             return UserProfile.objects.none()
             
-        # Find matching users
-        users = User.objects.filter(
-            Q(username__icontains=query) |
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query)
+        # Every user has had a profile since signup, so this is read-only.
+        profiles = UserProfile.objects.with_counts().filter(
+            Q(user__username__icontains=query) |
+            Q(user__first_name__icontains=query) |
+            Q(user__last_name__icontains=query),
+            user__deleted_at__isnull=True,
         )
-        
-        # Get or create UserProfile for each user
-        user_profiles = []
-        for user in users:
-            profile, created = UserProfile.objects.get_or_create(user=user)
-            user_profiles.append(profile)
-            
-        return user_profiles
+        if self.request.user.is_authenticated:
+            is_following = Exists(Follow.objects.filter(
+                follower=self.request.user,
+                following=OuterRef('user'),
+            ))
+        else:
+            is_following = Value(False)
+        return profiles.annotate(is_following=is_following)
+
+class LoadMetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        scopes = settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+        counters = [f'throttled:{scope}' for scope in scopes] + ['shed:low', 'shed:normal']
+        return Response({
+            'rejected': metrics.snapshot(counters),
+            'load': current_load,
+        })
+
+class DataExportView(APIView):
+    """
+    Streams an export of everything, or of one user (?user=alice), as JSON
+    Lines. Rows are sent as they are read, so the response never sits in
+    memory. Password hashes never leave through here; use
+    `manage.py export_data --credentials` for a full backup.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        username = request.GET.get('user')
+        user = get_object_or_404(User, username=username) if username else None
+        response = StreamingHttpResponse(export_lines(user), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="{username or "loop"}-export.jsonl"'
+        return response
 
 class NewsFeedView(generics.ListAPIView):
     serializer_class = PostSerializer
+    pagination_class = PostPagination
     
     def get_queryset(self):
-        
         following_ids = self.request.user.follows.values_list('following_id', flat=True)
-        return Post.objects.filter(user_id__in=following_ids).order_by('-created_at')
+        queryset = with_authors(Post.objects.all()).order_by('-created_at')
+        if not is_sharded():
+            return queryset.filter(user_id__in=following_ids)
+        # Scatter to the shards that hold someone the user follows and
+        # merge their newest posts.
+        by_shard = {}
+        for user_id in following_ids:
+            for alias in shards_for_user(user_id):
+                by_shard.setdefault(alias, []).append(user_id)
+        if not by_shard:
+            return queryset.none()
+        return across_shards(queryset, {
+            alias: queryset.using(alias).filter(user_id__in=user_ids)
+            for alias, user_ids in by_shard.items()
+        })
     
 
 def home(request):
@@ -221,17 +331,65 @@ def register_page(request):
 def login_page(request):
     return render(request, 'login.html')
 
+def first_page_of_posts(author=None):
+    """
+    Returns the first page of posts (by `author`, or everyone's) for
+    server-side rendering and whether the API has a second page for the
+    client to fetch.
+    """
+    page_size = PostPagination.page_size
+
+    def counted(queryset):
+        # Pick the page first, so the counts run for its rows only.
+        page = queryset.values('pk')[:page_size + 1]
+        return with_authors(queryset.filter(pk__in=page).with_counts())
+
+    queryset = Post.objects.order_by('-created_at')
+    if author is None:
+        queryset = across_shards(queryset)
+    else:
+        queryset = for_author(queryset, author.id)
+    if isinstance(queryset, MergedQuerySet):
+        queryset = MergedQuerySet({
+            alias: counted(shard) for alias, shard in queryset.querysets.items()
+        })
+    else:
+        queryset = counted(queryset)
+    posts = list(queryset[:page_size + 1])
+    has_next = len(posts) > page_size
+    return posts[:page_size], has_next
+
 def feed_page(request):
-    return render(request, 'feed.html')
+    if not request.user.is_authenticated:
+        return redirect('login')
+    posts, has_next = first_page_of_posts()
+    for post in posts:
+        post.is_owner = post.user_id == request.user.id
+    return render(request, 'feed.html', {'posts': posts, 'has_next': has_next})
 
 def logout(request):
     auth_logout(request)
     return redirect('home')
 
 def profile_page(request):
-    return render(request, 'profile.html')
+    if not request.user.is_authenticated:
+        return redirect('login')
+    posts, has_next = first_page_of_posts(request.user)
+    return render(request, 'profile.html', {
+        'profile': UserProfile.objects.with_counts().get(user=request.user),
+        'posts': posts,
+        'has_next': has_next,
+        'post_count': for_author(Post.objects.all(), request.user.id).count(),
+    })
 
 
 def user_profile_page(request, username):
-    profile_user = get_object_or_404(User, username=username)
-    return render(request, 'user_profile.html', {'profile_user': profile_user})
\ No newline at end of file
+    profile_user = get_object_or_404(User, username=username, deleted_at__isnull=True)
+    posts, has_next = first_page_of_posts(profile_user)
+    return render(request, 'user_profile.html', {
+        'profile_user': profile_user,
+        'profile': UserProfile.objects.with_counts().get(user=profile_user),
+        'posts': posts,
+        'has_next': has_next,
+        'post_count': for_author(Post.objects.all(), profile_user.id).count(),
+    })
\ No newline at end of file
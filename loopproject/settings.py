@@ -47,10 +47,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'loop_app.middleware.RequestTraceMiddleware',
+    'loop_app.middleware.LoadSheddingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'loop_app.middleware.PrimaryPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -61,7 +64,49 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-    ]
+    ],
+    # Render's load balancer is the one proxy in front of the app; it appends
+    # the client address to X-Forwarded-For. Anything before that entry is
+    # whatever the client sent, so throttles must not key on it.
+    'NUM_PROXIES': 1,
+    # Token bucket sizes for loop_app.throttling: '10/min' is a burst of 10
+    # that refills one request every 6 seconds.
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '10/min',
+        'search': '30/min',
+        'like': '60/min',
+    },
+}
+
+# Throttle buckets and metrics counters live here. Point it at a shared
+# cache (Redis, Memcached) when running more than one worker process.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+LOAD_SHEDDING = {
+    'MAX_IN_FLIGHT': 64,
+    'P99_MS': 2000,
+    # Time a request may wait for a worker, from the proxy's X-Request-Start.
+    'MAX_QUEUE_MS': 500,
+    'RETRY_AFTER': 2,
+    'LATENCY_WINDOW_SECONDS': 30,
+    'LOW_PRIORITY_ROUTES': [
+        'user-search', 'news-feed', 'post-list', 'comment-list',
+        'like-post', 'like-comment',
+    ],
+}
+
+# Sampled, anonymized request traces for `manage.py replay_traces`. Each
+# worker writes traces/requests-<pid>.jsonl, rotated at MAX_BYTES.
+TRACE_REQUESTS = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.05,
+    'DIR': BASE_DIR / 'traces',
+    'MAX_BYTES': 50 * 1024 * 1024,
+    'BACKUP_COUNT': 10,
 }
 
 AUTH_USER_MODEL = 'loop_app.User'
@@ -73,13 +118,19 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compiled templates are kept in memory instead of re-parsed per render.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -90,13 +141,74 @@ WSGI_APPLICATION = 'loopproject.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite runs in WAL mode so readers never block on the writer, and
+# connections are kept open between requests instead of reopened each time.
+# db.sqlite3 is not tracked: `manage.py migrate` creates it, locally and in
+# build.sh on deploy.
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL;'
+    'PRAGMA synchronous=NORMAL;'
+    'PRAGMA busy_timeout=5000;'
+    'PRAGMA cache_size=-20000;'
+    'PRAGMA temp_store=MEMORY;'
+    'PRAGMA mmap_size=134217728;'
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': SQLITE_PRAGMAS,
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+    },
+    # Read-only connection to the same file. On a single node this is the
+    # "replica"; point it at a real replica when one exists.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{BASE_DIR / 'db.sqlite3'}?mode=ro",
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': 'PRAGMA busy_timeout=5000;PRAGMA query_only=ON;',
+            'timeout': 20,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
 
+DATABASE_REPLICAS = ['replica']
+
+# Posts, comments and likes are partitioned by author across DATABASE_SHARDS
+# (at most 16). 'default' is always shard 0 and also keeps users, profiles
+# and follows. Each extra shard is another SQLite file here; run
+# `manage.py migrate --database shardN` after raising SHARD_COUNT. Raise it
+# once, from 1: posts written before that stay on 'default' and are still
+# found there. Changing it again moves authors to other shards, so their
+# rows would have to be redistributed first.
+SHARD_COUNT = 1
+DATABASE_SHARDS = ['default'] + [f'shard{i}' for i in range(1, SHARD_COUNT)]
+for alias in DATABASE_SHARDS[1:]:
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / f'{alias}.sqlite3',
+    }
+
+DATABASE_ROUTERS = [
+    'loop_app.routers.ShardRouter',
+    'loop_app.routers.ReadReplicaRouter',
+]
+
+# After a write, the client reads from the primary for this many seconds.
+REPLICA_PIN_COOKIE = 'pin_primary'
+REPLICA_PIN_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -134,6 +246,27 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic writes fingerprinted copies (app.3f2a1c.css) plus a manifest,
+# so they can be served with far-future cache headers. Deploys run
+# `manage.py build_assets` (which needs the Tailwind CLI, see below); until
+# it has run, pages link the plain file names, and with DEBUG on use the
+# Tailwind CDN instead of the missing stylesheet.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'loop_app.storage.ManifestStaticStorage',
+    },
+}
+
+# `manage.py build_assets` compiles only the Tailwind classes the templates use.
+TAILWIND_CLI = 'tailwindcss'
+TAILWIND_CONFIG = BASE_DIR / 'tailwind.config.js'
+TAILWIND_INPUT = BASE_DIR / 'loop_app' / 'assets' / 'tailwind.css'
+TAILWIND_OUTPUT = 'loop_app/css/app.css'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
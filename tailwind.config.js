@@ -0,0 +1,11 @@
+/** Only classes used in these files end up in the built stylesheet. */
+module.exports = {
+  content: [
+    './loop_app/templates/**/*.html',
+    './loop_app/static/loop_app/js/**/*.js',
+  ],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+};